@@ -0,0 +1,11 @@
+"""Settings profiles of the app.
+
+`app.settings` itself is the development profile: every app and
+middleware, DEBUG on. Production workers pick a profile with
+DJANGO_SETTINGS_MODULE:
+
+- `app.settings.api` for the API workers: token authentication only, no
+  admin, sessions or messages, and a minimal middleware stack.
+- `app.settings.admin` for the workers serving /admin/ and the rest.
+"""
+from app.settings.base import *  # noqa
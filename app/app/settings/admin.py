@@ -0,0 +1,2 @@
+"""Production profile of the workers serving /admin/ and the rest"""
+from app.settings.production import *  # noqa
@@ -0,0 +1,53 @@
+"""Production profile of the API workers.
+
+The API is token authenticated, so the API workers skip the session,
+CSRF, messages and clickjacking middleware and don't load the admin.
+Only the API and /metrics are routed, /admin/ is served by workers
+running `app.settings.admin`. The profiles of staff `?_profile=1`
+requests are stored in the database, so the admin workers list the ones
+taken here too. Measure the difference with
+`python -m benchmarks.settings_profiles`.
+"""
+from app.settings.production import *  # noqa
+from app.settings.production import REST_FRAMEWORK
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'rest_framework.authtoken',
+    'core',
+    'user',
+    'recepi',
+]
+
+MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'app.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_RENDERER_CLASSES=('core.renderers.ORJSONRenderer',),
+    DEFAULT_AUTHENTICATION_CLASSES=(
+        'user.authentication.CachedTokenAuthentication',
+    ),
+)
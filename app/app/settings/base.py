@@ -1,5 +1,5 @@
 """
-Django settings for app project.
+Django settings for app project, shared by every profile of app.settings.
 
 Generated by 'django-admin startproject' using Django 2.1.15.
 
@@ -13,7 +13,9 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
 
 
 # Quick-start development settings - unsuitable for production
@@ -45,7 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TimingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,6 +93,25 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, e.g. DB_REPLICA_HOSTS=db-replica.
+# Safe requests on REPLICA_PATHS read from them, see core.routers
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')),
+        start=1):
+    DATABASES['replica%d' % number] = dict(
+        DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append('replica%d' % number)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_PATHS = ('/api/recepi/', '/api/user/')
+# Clients read from the primary for this long after a write
+REPLICA_PIN_SECONDS = 5
+# Replicas further behind than this are skipped
+REPLICA_MAX_LAG_SECONDS = 5
+REPLICA_LAG_CHECK_INTERVAL = 1
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -127,3 +151,67 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 AUTH_USER_MODEL = 'core.User'
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Cached token authentication, see user.authentication
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TIMEOUT = 30
+TOKEN_AUTH_CACHE_ALIAS = None
+
+# Per-user data versions behind the ETags, see recepi.versions. The cache
+# must be shared between workers in production
+RECEPI_VERSION_CACHE = 'default'
+# ETags and the response cache of the recepi lists
+RECEPI_CONDITIONAL_ENABLED = True
+
+# Rendered list responses, keyed by user, path and data version
+RECEPI_RESPONSE_CACHE = 'responses'
+RECEPI_RESPONSE_CACHE_TIMEOUT = 300
+
+# Share of the requests timed by core.middleware.TimingMiddleware, the
+# views of these modules get a Server-Timing header and feed /metrics
+REQUEST_TIMING_SAMPLE_RATE = 1.0
+REQUEST_TIMING_VIEW_MODULES = ('recepi.views', 'user.views')
+# Addresses or networks allowed to scrape /metrics
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Staff requests with ?_profile=1 run under cProfile, the latest
+# PROFILE_BUFFER_SIZE are kept in the database, see core.profiling
+PROFILE_REQUESTS_ENABLED = True
+PROFILE_BUFFER_SIZE = 50
+PROFILE_TOP_N = 40
+
+# Most recepis returned by one /api/recepi/recepi/batch/ request
+RECEPI_BATCH_MAX_IDS = 100
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {
+            # LocMem evicts the least recently used entries past this
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+# Queries slower than this are aggregated in core.SlowQuery (None is off),
+# with their EXPLAIN on Postgres, see core.slowqueries
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_ASYNC = True
+SLOW_QUERY_QUEUE_SIZE = 1000
+SLOW_QUERY_EXPLAIN_INTERVAL = 3600
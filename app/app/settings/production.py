@@ -0,0 +1,54 @@
+"""Settings shared by the production profiles"""
+import os
+
+from app.settings.base import *  # noqa
+from app.settings.base import CACHES, DATABASES, SECRET_KEY
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+# Comma separated, e.g. DJANGO_ALLOWED_HOSTS=api.example.com,10.0.0.5
+ALLOWED_HOSTS = list(filter(
+    None, os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+))
+
+# Comma separated addresses or networks of the /metrics scrapers, e.g.
+# METRICS_ALLOWED_IPS=10.0.0.0/8
+if os.environ.get('METRICS_ALLOWED_IPS'):
+    METRICS_ALLOWED_IPS = tuple(filter(
+        None, os.environ['METRICS_ALLOWED_IPS'].split(',')
+    ))
+
+# Share of the requests timed for /metrics and Server-Timing
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.environ.get('REQUEST_TIMING_SAMPLE_RATE', 0.1)
+)
+
+# Keep database connections open between requests, in seconds
+DATABASES = {
+    alias: dict(database, CONN_MAX_AGE=int(
+        os.environ.get('DB_CONN_MAX_AGE', 60)
+    ))
+    for alias, database in DATABASES.items()
+}
+
+# Cache shared by the workers, e.g. DJANGO_CACHE_LOCATION=cache:11211 with
+# the default memcached backend. It holds the recepi data versions and the
+# token cache tier. Without one every worker has its own versions and
+# token LRU, so a write or a revoked token on one worker would never
+# invalidate the ETags, cached responses and tokens of the others: they
+# are turned off instead. The rendered responses stay in a per-worker
+# cache, keyed by the shared versions.
+if os.environ.get('DJANGO_CACHE_LOCATION'):
+    CACHES = dict(CACHES, default={
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.environ['DJANGO_CACHE_LOCATION'].split(','),
+    })
+    TOKEN_AUTH_CACHE_ALIAS = 'default'
+else:
+    RECEPI_CONDITIONAL_ENABLED = False
+    TOKEN_AUTH_CACHE_SIZE = 0
@@ -14,10 +14,19 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path
+
+from app import urls_api
+from core import views as core_views
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(core_views.profile_list),
+         name='profile-list'),
+    path('admin/profiles/<int:pk>/',
+         admin.site.admin_view(core_views.profile_detail),
+         name='profile-detail'),
+    path('admin/profiles/<int:pk>/pstats/',
+         admin.site.admin_view(core_views.profile_download),
+         name='profile-download'),
     path('admin/', admin.site.urls),
-    path('api/user/', include('user.urls')),
-    path('api/recepi/', include('recepi.urls')),
-]
+] + urls_api.urlpatterns
@@ -0,0 +1,10 @@
+"""URLs served by the API workers, see app.settings.api"""
+from django.urls import path, include
+
+from core import views as core_views
+
+urlpatterns = [
+    path('metrics', core_views.metrics_view, name='metrics'),
+    path('api/user/', include('user.urls')),
+    path('api/recepi/', include('recepi.urls')),
+]
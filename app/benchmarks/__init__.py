@@ -0,0 +1,5 @@
+"""Benchmarks run against a throwaway test database.
+
+Run them from the app directory, e.g. `python -m benchmarks.indexes`.
+Every benchmark prints its results as JSON on stdout.
+"""
@@ -0,0 +1,94 @@
+"""Time the tags/ingredients filters of the recepi list as the table grows.
+
+    python -m benchmarks.filters --sizes 1000,10000,100000
+"""
+import random
+
+from benchmarks import utils
+
+
+def grow(user, tags, ingredients, start, stop, rng):
+    """Add recepis start..stop linked to a few random tags/ingredients"""
+    from core.models import Recepi
+
+    recepis = utils.bulk_create(Recepi, [
+        Recepi(user=user, title='recepi %d' % i, time_minutes=10, price=5)
+        for i in range(start, stop)
+    ])
+    for field, targets, per_recepi in (('tags', tags, 3),
+                                       ('ingredients', ingredients, 5)):
+        relation = getattr(Recepi, field)
+        column = relation.field.m2m_reverse_field_name() + '_id'
+        utils.bulk_create(relation.through, [
+            relation.through(recepi_id=recepi.pk, **{column: target.pk})
+            for recepi in recepis
+            for target in rng.sample(targets, per_recepi)
+        ])
+
+
+def list_queryset(user, params):
+    """Return the queryset the recepi list view builds for params"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from recepi.views import RecepiViewSet
+
+    request = Request(APIRequestFactory().get('/', params))
+    request.user = user
+    view = RecepiViewSet(action='list', request=request, format_kwarg=None)
+
+    return view.get_queryset()
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    utils.setup()
+    from django.contrib.auth import get_user_model
+    from core.models import Tag, Ingredient
+
+    rng = random.Random(args.seed)
+    results = []
+    with utils.test_database(args.keepdb) as connection:
+        user = get_user_model().objects.create_user('bench@example.com')
+        tags = [Tag.objects.create(user=user, name='tag %d' % i)
+                for i in range(50)]
+        ingredients = [
+            Ingredient.objects.create(user=user, name='ingredient %d' % i)
+            for i in range(200)
+        ]
+        cases = {
+            'tags_any': {'tags': '%d,%d' % (tags[0].pk, tags[1].pk)},
+            'tags_all': {'tags': '%d,%d' % (tags[0].pk, tags[1].pk),
+                         'match': 'all'},
+            'tags_and_ingredients': {'tags': str(tags[0].pk),
+                                     'ingredients': str(ingredients[0].pk)},
+        }
+
+        size = 0
+        for target in sizes:
+            grow(user, tags, ingredients, size, target, rng)
+            size = target
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            row = {'recepis': size}
+            for name, params in cases.items():
+                page = list_queryset(user, params)[:args.page_size]
+                row[name] = {
+                    'latency': utils.timeit(
+                        lambda: list(page.all()), args.repeat
+                    ),
+                    'explain': page.explain(),
+                }
+            results.append(row)
+
+    utils.report({'vendor': connection.vendor, 'results': results})
+
+
+if __name__ == '__main__':
+    main()
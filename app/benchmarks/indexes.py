@@ -0,0 +1,98 @@
+"""Compare the list queries with and without the (user, ...) indexes.
+
+    python -m benchmarks.indexes --users 50 --rows-per-user 2000
+"""
+from benchmarks import utils
+
+
+def seed(users, rows_per_user):
+    """Create users owning tags, ingredients and recepis"""
+    from django.contrib.auth import get_user_model
+    from core.models import Tag, Ingredient, Recepi
+
+    User = get_user_model()
+    utils.bulk_create(User, [
+        User(email='bench%d@example.com' % i, password='')
+        for i in range(users)
+    ])
+    owners = list(User.objects.order_by('id'))
+    for model in (Tag, Ingredient):
+        utils.bulk_create(model, [
+            model(user=owner, name='%s %d' % (model.__name__, i % 997))
+            for owner in owners for i in range(rows_per_user)
+        ])
+    utils.bulk_create(Recepi, [
+        Recepi(user=owner, title='recepi %d' % i, time_minutes=10, price=5)
+        for owner in owners for i in range(rows_per_user)
+    ])
+
+    return owners
+
+
+def queries(user):
+    """Return the query behind every list endpoint"""
+    from core.models import Tag, Ingredient, Recepi
+
+    return {
+        'tag': Tag.objects.filter(user=user).order_by('-name', 'id'),
+        'ingredient': Ingredient.objects.filter(
+            user=user
+        ).order_by('-name', 'id'),
+        'recepi': Recepi.objects.filter(user=user).order_by('-id'),
+    }
+
+
+def measure(user, page_size, repeat):
+    """Time and explain the first page of every list query"""
+    results = {}
+    for name, queryset in queries(user).items():
+        page = queryset[:page_size]
+        results[name] = {
+            'latency': utils.timeit(lambda: list(page.all()), repeat),
+            'explain': page.explain(),
+        }
+
+    return results
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--rows-per-user', type=int, default=2000)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    utils.setup()
+    from core.models import Tag, Ingredient, Recepi
+
+    with utils.test_database(args.keepdb) as connection:
+        owners = seed(args.users, args.rows_per_user)
+        user = owners[len(owners) // 2]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        after = measure(user, args.page_size, args.repeat)
+        indexes = [
+            (model, index)
+            for model in (Tag, Ingredient, Recepi)
+            for index in model._meta.indexes
+        ]
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        before = measure(user, args.page_size, args.repeat)
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+
+    utils.report({
+        'vendor': connection.vendor,
+        'users': args.users,
+        'rows_per_user': args.rows_per_user,
+        'before': before,
+        'after': after,
+    })
+
+
+if __name__ == '__main__':
+    main()
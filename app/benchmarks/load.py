@@ -0,0 +1,295 @@
+"""Drive the API endpoints with concurrent clients over HTTP.
+
+The app is served by a threaded WSGI server on a free local port, backed
+by a freshly migrated test database seeded with --users users owning
+--recepis-per-user recepis each. Every scenario sends --requests requests
+from --clients concurrent clients and reports latency percentiles,
+requests/sec and database queries per request (read from the
+Server-Timing header):
+
+    python -m benchmarks.load --users 20 --recepis-per-user 200 \\
+        --clients 8 --requests 400 > load.json
+
+Run it against Postgres: SQLite serializes writers, so the concurrent
+create scenarios fail with locking errors there.
+"""
+import http.client
+import itertools
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler
+
+from benchmarks import utils
+
+PASSWORD = 'benchmark-password'
+HOST = 'testserver'
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve():
+    """Start serving the app in a thread and return the server"""
+    from django.core.servers.basehttp import ThreadedWSGIServer, \
+        get_internal_wsgi_application
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(get_internal_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def seed(users, recepis_per_user, rng):
+    """Create users with tokens, tags, ingredients and linked recepis"""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+    from core.models import Tag, Ingredient, Recepi
+    from recepi import search
+
+    password = make_password(PASSWORD)
+    owners = utils.bulk_create(get_user_model(), [
+        get_user_model()(email='load%d@example.com' % i, name='Load %d' % i,
+                         password=password)
+        for i in range(users)
+    ])
+    tokens = [Token(user=user) for user in owners]
+    for token in tokens:
+        token.key = token.generate_key()
+    utils.bulk_create(Token, tokens)
+    tags = utils.bulk_create(Tag, [
+        Tag(user=user, name='tag %d' % i) for user in owners for i in range(20)
+    ])
+    ingredients = utils.bulk_create(Ingredient, [
+        Ingredient(user=user, name='ingredient %d' % i)
+        for user in owners for i in range(60)
+    ])
+    recepis = utils.bulk_create(Recepi, [
+        Recepi(user=user, title='recepi %d' % i, time_minutes=10 + i % 50,
+               price='%d.50' % (i % 30))
+        for user in owners for i in range(recepis_per_user)
+    ])
+
+    by_user = {user.pk: {'tags': [], 'ingredients': [], 'recepis': []}
+               for user in owners}
+    for field, objs in (('tags', tags), ('ingredients', ingredients),
+                        ('recepis', recepis)):
+        for obj in objs:
+            by_user[obj.user_id][field].append(obj.pk)
+    for field, per_recepi in (('tags', 2), ('ingredients', 6)):
+        relation = getattr(Recepi, field)
+        column = relation.field.m2m_reverse_field_name() + '_id'
+        utils.bulk_create(relation.through, [
+            relation.through(recepi_id=recepi.pk, **{column: pk})
+            for recepi in recepis
+            for pk in rng.sample(by_user[recepi.user_id][field], per_recepi)
+        ])
+    search.reindex([recepi.pk for recepi in recepis])
+
+    return [dict(by_user[token.user_id], email=token.user.email,
+                 token=token.key) for token in tokens]
+
+
+def scenarios(accounts, rng):
+    """Return {name: function returning (method, path, body, account)}"""
+    counter = itertools.count()
+
+    def account():
+        return rng.choice(accounts)
+
+    def get(path):
+        return lambda: ('GET', path, None, account())
+
+    def detail():
+        owner = account()
+        return ('GET', '/api/recepi/recepi/%d/' % rng.choice(
+            owner['recepis']
+        ), None, owner)
+
+    def create(path, name):
+        return lambda: ('POST', path, {'name': '%s %d' % (
+            name, next(counter)
+        )}, account())
+
+    def create_recepi():
+        owner = account()
+        return ('POST', '/api/recepi/recepi/', {
+            'title': 'new recepi %d' % next(counter),
+            'time_minutes': 20,
+            'price': '4.50',
+            'tags': rng.sample(owner['tags'], 2),
+            'ingredients': rng.sample(owner['ingredients'], 6),
+        }, owner)
+
+    def token():
+        owner = account()
+        return ('POST', '/api/user/token/', {
+            'email': owner['email'], 'password': PASSWORD,
+        }, None)
+
+    return {
+        'token': token,
+        'me': get('/api/user/me/'),
+        'tags_list': get('/api/recepi/tags/'),
+        'ingredients_list': get('/api/recepi/ingredients/'),
+        'recepis_list': get('/api/recepi/recepi/'),
+        'recepis_detail': detail,
+        'tags_create': create('/api/recepi/tags/', 'new tag'),
+        'ingredients_create': create(
+            '/api/recepi/ingredients/', 'new ingredient'
+        ),
+        'recepis_create': create_recepi,
+    }
+
+
+class Client:
+    """Keep-alive HTTP client for one concurrent user"""
+
+    def __init__(self, port):
+        self.port = port
+        self.connection = None
+
+    def request(self, method, path, body, account):
+        """Send the request, return (seconds, status, queries)"""
+        headers = {'Host': HOST, 'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if account is not None:
+            headers['Authorization'] = 'Token ' + account['token']
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(
+                '127.0.0.1', self.port
+            )
+
+        start = time.perf_counter()
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        response.read()
+        seconds = time.perf_counter() - start
+
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+
+        return seconds, response.status, queries(
+            response.getheader('Server-Timing', '')
+        )
+
+
+def queries(server_timing):
+    """Return the query count of a Server-Timing header, or None"""
+    for metric in server_timing.split(','):
+        params = metric.strip().split(';')
+        if params[0] == 'db':
+            for param in params[1:]:
+                if param.startswith('desc='):
+                    return int(param[5:].strip('"').split()[0])
+    return None
+
+
+def run_scenario(port, make_request, clients, requests):
+    """Send requests from clients threads, return the scenario stats"""
+    local = threading.local()
+
+    def send(_):
+        if not hasattr(local, 'client'):
+            local.client = Client(port)
+        try:
+            return local.client.request(*make_request())
+        except (OSError, http.client.HTTPException):
+            local.client = Client(port)
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(send, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    done = [result for result in results if result is not None]
+    failed = len(results) - len(done) + sum(
+        1 for _, status, _ in done if status >= 400
+    )
+    counts = [count for _, _, count in done if count is not None]
+    stats = utils.latency_stats([seconds * 1000 for seconds, _, _ in done])
+    stats.update({
+        'requests': len(results),
+        'errors': failed,
+        'requests_per_sec': round(len(results) / elapsed, 1),
+        'queries_per_request': round(sum(counts) / len(counts), 2)
+        if counts else None,
+    })
+
+    return stats
+
+
+def git_commit():
+    """Return the current commit, so runs can be compared"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--recepis-per-user', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400,
+                        help='Requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20,
+                        help='Untimed requests per scenario')
+    parser.add_argument('--scenario', action='append', dest='scenarios',
+                        help='Only run this scenario, can be repeated')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    from django.db import connection
+
+    rng = random.Random(args.seed)
+    with utils.test_database(args.keepdb):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1.0
+        accounts = seed(args.users, args.recepis_per_user, rng)
+        server = serve()
+        port = server.server_address[1]
+        results = {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'options': {key: value for key, value in vars(args).items()
+                        if key not in ('keepdb', 'repeat')},
+            'scenarios': {},
+        }
+        try:
+            for name, make_request in scenarios(accounts, rng).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                if args.warmup:
+                    run_scenario(port, make_request, args.clients,
+                                 args.warmup)
+                results['scenarios'][name] = run_scenario(
+                    port, make_request, args.clients, args.requests
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    utils.report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Compare DRF's JSONRenderer with the orjson renderer on recepi lists.
+
+    python -m benchmarks.renderers --recepis 10000
+"""
+import tracemalloc
+from decimal import Decimal
+
+from benchmarks import utils
+
+
+def recepi_list(count):
+    """Return a list shaped like the recepi list response"""
+    return {
+        'next': 'http://testserver/api/recepi/recepi/?cursor=abc',
+        'previous': None,
+        'results': [{
+            'id': i,
+            'title': 'Recepi number %d' % i,
+            'ingredients': list(range(i % 12)),
+            'tags': list(range(i % 4)),
+            'time_minutes': i % 120,
+            'price': Decimal('%d.%02d' % (i % 100, i % 97)),
+            'link': 'https://example.com/recepis/%d' % i,
+        } for i in range(count)],
+    }
+
+
+def peak_allocation(func):
+    """Return the peak of the memory allocated while running func"""
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return peak
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--recepis', type=int, default=10000)
+    args = parser.parse_args()
+
+    utils.setup()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import ORJSONRenderer
+
+    data = recepi_list(args.recepis)
+    results = {'recepis': args.recepis}
+    for renderer in (JSONRenderer(), ORJSONRenderer()):
+        name = type(renderer).__name__
+        results[name] = {
+            'latency': utils.timeit(
+                lambda: renderer.render(data), args.repeat
+            ),
+            'peak_allocated_bytes': peak_allocation(
+                lambda: renderer.render(data)
+            ),
+            'output_bytes': len(renderer.render(data)),
+        }
+
+    utils.report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Compare rows/sec of the serializer and values() list paths.
+
+    python -m benchmarks.serialization --recepis 20000 --page-size 1000
+"""
+import random
+
+from benchmarks import utils
+
+
+def seed(count, rng):
+    """Create a user owning count recepis linked to tags and ingredients"""
+    from django.contrib.auth import get_user_model
+    from core.models import Tag, Ingredient, Recepi
+
+    user = get_user_model().objects.create_user('bench@example.com')
+    tags = utils.bulk_create(Tag, [Tag(user=user, name='tag %d' % i)
+                                   for i in range(50)])
+    ingredients = utils.bulk_create(Ingredient, [
+        Ingredient(user=user, name='ingredient %d' % i) for i in range(200)
+    ])
+    recepis = utils.bulk_create(Recepi, [
+        Recepi(user=user, title='recepi %d' % i, time_minutes=10,
+               price='%d.99' % (i % 100))
+        for i in range(count)
+    ])
+    for field, targets, per_recepi in (('tags', tags, 3),
+                                       ('ingredients', ingredients, 8)):
+        relation = getattr(Recepi, field)
+        column = relation.field.m2m_reverse_field_name() + '_id'
+        utils.bulk_create(relation.through, [
+            relation.through(recepi_id=recepi.pk, **{column: target.pk})
+            for recepi in recepis
+            for target in rng.sample(targets, per_recepi)
+        ])
+
+    return user
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--recepis', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    utils.setup()
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from recepi.views import TagViewSet, RecepiViewSet
+
+    def view_for(viewset, user):
+        request = Request(APIRequestFactory().get(
+            '/', {'page_size': args.page_size}
+        ))
+        request.user = user
+        return viewset(action='list', request=request, format_kwarg=None)
+
+    def serializer_path(view):
+        page = view.paginate_queryset(view.get_queryset())
+        return view.get_serializer(page, many=True).data
+
+    def values_path(view):
+        serializer = view.get_serializer()
+        plan = view.get_values_plan(serializer)
+        columns = [source for _, source, kind, _ in plan if kind == 'column']
+        rows = view.get_queryset().prefetch_related(None).values(*columns)
+        page = view.paginate_queryset(rows)
+        return view.rows_to_data(serializer.Meta.model, plan, page)
+
+    results = {}
+    with utils.test_database(args.keepdb):
+        user = seed(args.recepis, random.Random(args.seed))
+        for viewset in (TagViewSet, RecepiViewSet):
+            view = view_for(viewset, user)
+            rows = len(serializer_path(view))
+            assert serializer_path(view) == values_path(view)
+            name = viewset.__name__
+            results[name] = {'rows': rows}
+            for path in (serializer_path, values_path):
+                latency = utils.timeit(lambda: path(view), args.repeat)
+                latency['rows_per_sec'] = round(
+                    rows / latency['p50_ms'] * 1000
+                )
+                results[name][path.__name__] = latency
+
+    utils.report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Compare the startup time and middleware overhead of settings profiles.
+
+Every profile is measured in fresh processes with DJANGO_SETTINGS_MODULE
+set to it:
+
+- startup: the wall time of a process that imports the settings, runs
+  django.setup(), builds the WSGI application and loads the URLconf, the
+  share of it spent in Django, and the number of imported modules.
+- middleware: the latency of a request to a view doing nothing, through
+  the profile's MIDDLEWARE and through no middleware at all, with a token
+  Authorization header like the API clients send. The difference is the
+  per-request cost of the middleware stack.
+
+    python -m benchmarks.settings_profiles --repeat 20 --requests 5000 \\
+        > profiles.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.urls import path
+
+from benchmarks import utils
+
+PROFILES = ('app.settings.api', 'app.settings.admin')
+HOST = 'testserver'
+
+
+def ping(request):
+    """A view doing nothing, so only the request handling is timed"""
+    from django.http import HttpResponse
+
+    return HttpResponse(b'{}', content_type='application/json')
+
+
+urlpatterns = [path('ping', ping)]
+
+
+def environ():
+    """Return the WSGI environ of an API request to ping"""
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': '/ping',
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_ACCEPT': 'application/json',
+        'HTTP_AUTHORIZATION': 'Token ' + '0' * 40,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.errors': sys.stderr,
+    }
+
+
+def measure_startup():
+    """Load the app like a starting worker, return the stats"""
+    start = time.perf_counter()
+    utils.setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    get_wsgi_application()
+    get_resolver().url_patterns
+
+    return {
+        'django_ms': (time.perf_counter() - start) * 1000,
+        'modules': len(sys.modules),
+    }
+
+
+def measure_middleware(requests):
+    """Time requests to ping with and without the middleware stack"""
+    utils.setup()
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test.utils import override_settings
+
+    def start_response(status, headers):
+        assert status.startswith('200'), status
+
+    def handle(handler):
+        response = handler(environ(), start_response)
+        response.close()
+
+    handlers = {}
+    with override_settings(ROOT_URLCONF=__name__):
+        for name, middleware in (('with_middleware', settings.MIDDLEWARE),
+                                 ('without_middleware', [])):
+            with override_settings(MIDDLEWARE=middleware):
+                handlers[name] = WSGIHandler()
+
+        # alternate the stacks so both see the same warmup and noise
+        samples = {name: [] for name in handlers}
+        for number in range(requests + 100):
+            for name, handler in handlers.items():
+                start = time.perf_counter()
+                handle(handler)
+                if number >= 100:
+                    samples[name].append(
+                        (time.perf_counter() - start) * 1000
+                    )
+
+    results = {'middleware': list(settings.MIDDLEWARE)}
+    for name in handlers:
+        results[name] = utils.latency_stats(samples[name])
+    results['overhead_p50_ms'] = round(
+        results['with_middleware']['p50_ms'] -
+        results['without_middleware']['p50_ms'], 3
+    )
+    return results
+
+
+def child(args):
+    """Run one measurement in this process and print it as JSON"""
+    if args.child == 'startup':
+        results = measure_startup()
+    else:
+        results = measure_middleware(args.requests)
+    json.dump(results, sys.stdout)
+
+
+def run_child(profile, mode, requests=0):
+    """Run a measurement in a new process, return (seconds, results)"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+    env.setdefault('DJANGO_ALLOWED_HOSTS', HOST)
+    start = time.perf_counter()
+    output = subprocess.check_output(
+        [sys.executable, '-m', __spec__.name, '--child', mode,
+         '--requests', str(requests)],
+        env=env,
+    )
+
+    return time.perf_counter() - start, json.loads(output)
+
+
+def measure(profile, repeat, requests):
+    """Return the startup and middleware stats of a profile"""
+    process, django, modules = [], [], []
+    for _ in range(repeat):
+        seconds, startup = run_child(profile, 'startup')
+        process.append(seconds * 1000)
+        django.append(startup['django_ms'])
+        modules.append(startup['modules'])
+    _, middleware = run_child(profile, 'middleware', requests)
+
+    return {
+        'startup': {
+            'process': utils.latency_stats(process),
+            'django': utils.latency_stats(django),
+            'modules': max(modules),
+        },
+        'request': middleware,
+    }
+
+
+def main():
+    parser = utils.parser(__doc__)
+    parser.add_argument('--profile', action='append', dest='profiles',
+                        help='Settings module to measure, can be repeated')
+    parser.add_argument('--requests', type=int, default=5000,
+                        help='Timed requests per middleware stack')
+    parser.add_argument('--child', choices=('startup', 'middleware'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    utils.report({
+        profile: measure(profile, args.repeat, args.requests)
+        for profile in args.profiles or PROFILES
+    })
+
+
+if __name__ == '__main__':
+    main()
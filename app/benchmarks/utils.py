@@ -0,0 +1,89 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """Configure django for a standalone benchmark script"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+def parser(description):
+    """Return an argument parser with the options every benchmark shares"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Timed runs per measurement')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Reuse the test database between runs')
+
+    return parser
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Create the test database, migrate it and drop it afterwards"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, \
+        teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, 0, keepdb)
+        teardown_test_environment()
+
+
+def bulk_create(model, objs, batch_size=5000):
+    """bulk_create in batches the database backend can accept"""
+    from django.db import transaction
+    from core import bulk
+
+    with transaction.atomic():
+        return bulk.bulk_create(model, objs, size=batch_size)
+
+
+def timeit(func, repeat=20):
+    """Run func repeat times and return latency stats in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return latency_stats(samples)
+
+
+def latency_stats(samples):
+    """Return min/p50/p95/p99/max of latency samples in milliseconds"""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def percentile(share):
+        # nearest rank
+        rank = math.ceil(len(samples) * share)
+        return round(samples[max(rank - 1, 0)], 3)
+
+    return {
+        'min_ms': round(samples[0], 3),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def report(results):
+    """Write the benchmark results as JSON"""
+    json.dump(results, sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
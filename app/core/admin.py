@@ -25,7 +25,19 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class SlowQueryAdmin(admin.ModelAdmin):
+    ordering = ['-total_ms']
+    list_display = ['sql', 'view', 'calls', 'total_ms', 'max_ms', 'last_seen']
+    list_filter = ['view']
+    search_fields = ['sql', 'view']
+    readonly_fields = [field.name for field in models.SlowQuery._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
 admin.site.register(models.Recepi)
+admin.site.register(models.SlowQuery, SlowQueryAdmin)
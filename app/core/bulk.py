@@ -0,0 +1,164 @@
+import io
+
+from django.db import connections, router
+
+
+def batch_size(model, size=1000):
+    """Return the largest batch up to size the database accepts for model"""
+    connection = connections[router.db_for_write(model)]
+    fields = [field for field in model._meta.concrete_fields
+              if not field.primary_key]
+
+    limit = connection.ops.bulk_batch_size(fields, [None] * size)
+
+    return min(size, max(limit, 1))
+
+
+def param_batches(values, using, size=1000, reserved=0):
+    """Split values into lists of up to size that fit, next to reserved
+    other params, in the params of one query on the database using"""
+    values = list(values)
+    limit = connections[using].features.max_query_params
+    if limit:
+        size = min(size, limit - reserved)
+
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def bulk_create(model, objs, size=1000, fetch_pks=True):
+    """bulk_create objs in batches and make sure their pks are set.
+
+    Backends that can't return ids from a bulk insert (SQLite) get the pks
+    of the last inserted rows, so it must run inside transaction.atomic()
+    where the write lock keeps other inserts out until commit.
+    """
+    objs = list(objs)
+    manager = model._default_manager
+    manager.bulk_create(objs, batch_size=batch_size(model, size))
+
+    if fetch_pks and objs and objs[0].pk is None:
+        pks = manager.order_by('-pk').values_list('pk', flat=True)
+        for obj, pk in zip(objs, reversed(list(pks[:len(objs)]))):
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = manager.db
+
+    return objs
+
+
+def set_related(instance, name, objs):
+    """Make the many-to-many field name of instance point to objs.
+
+    Unlike the related manager's set(), the links are diffed against one
+    read of the current pks, then the new ones are added with a single
+    bulk_create and the stale ones removed with a single DELETE. No
+    m2m_changed signal is sent.
+    """
+    field = instance._meta.get_field(name)
+    through = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name()).column
+    target = through._meta.get_field(field.m2m_reverse_field_name()).column
+    links = through._default_manager.filter(**{source: instance.pk})
+
+    current = set(links.values_list(target, flat=True))
+    wanted = list(dict.fromkeys(obj.pk for obj in objs))
+    removed = current.difference(wanted)
+    added = [pk for pk in wanted if pk not in current]
+
+    if added:
+        bulk_create(through, [
+            through(**{source: instance.pk, target: pk}) for pk in added
+        ], fetch_pks=False)
+    if removed:
+        # delete() would select the rows first, as the through model
+        # has m2m_changed receivers
+        connection = connections[links.db]
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for batch in param_batches(removed, links.db, reserved=1):
+                cursor.execute(
+                    'DELETE FROM %s WHERE %s = %%s AND %s IN (%s)' % (
+                        quote(through._meta.db_table), quote(source),
+                        quote(target), ', '.join(['%s'] * len(batch)),
+                    ), [instance.pk] + batch
+                )
+    getattr(instance, '_prefetched_objects_cache', {}).pop(name, None)
+
+    return added, list(removed)
+
+
+def copy_line(values):
+    """Return one line of COPY csv input.
+
+    NULL is the unquoted empty value and every other value is quoted, so
+    blank strings (e.g. a recepi without link) stay '' and no string can
+    be read as NULL.
+    """
+    return ','.join(
+        '' if value is None else '"%s"' % str(value).replace('"', '""')
+        for value in values
+    ) + '\n'
+
+
+def copy(objs):
+    """Insert objs with COPY (Postgres only), reserving their ids from the
+    sequence"""
+    objs = list(objs)
+    if not objs:
+        return objs
+    model = type(objs[0])
+    connection = connections[router.db_for_write(model)]
+    table = model._meta.db_table
+    fields = model._meta.concrete_fields
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+            "FROM generate_series(1, %s)",
+            [table, model._meta.pk.column, len(objs)]
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write(copy_line(
+                field.get_db_prep_save(getattr(obj, field.attname),
+                                       connection)
+                for field in fields
+            ))
+        buffer.seek(0)
+        cursor.copy_expert(
+            'COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (
+                connection.ops.quote_name(table),
+                ', '.join(connection.ops.quote_name(field.column)
+                          for field in fields),
+            ), buffer
+        )
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = connection.alias
+
+    return objs
+
+
+def insert_rows(model, columns, rows, size=10000):
+    """Insert tuples of column values with executemany.
+
+    No model instance is built and no pk is fetched, which makes it the
+    fastest way to fill tables like many-to-many links on backends
+    without COPY.
+    """
+    connection = connections[router.db_for_write(model)]
+    sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    rows = list(rows)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            cursor.executemany(sql, rows[start:start + size])
+
+    return len(rows)
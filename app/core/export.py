@@ -0,0 +1,118 @@
+"""Streaming export of a user's recepis as NDJSON or CSV"""
+import csv
+import io
+import json
+import zlib
+
+from django.db.models import prefetch_related_objects
+
+from core.models import Recepi
+
+FORMATS = ('ndjson', 'csv')
+CSV_HEADER = ('id', 'title', 'time_minutes', 'price', 'link', 'tags',
+              'ingredients')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_recepis(queryset, chunk_size=1000):
+    """Yield the recepis of queryset with their tags and ingredients,
+    holding at most one chunk of rows in memory"""
+    chunk = []
+    for recepi in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(recepi)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, 'tags', 'ingredients')
+            yield from chunk
+            chunk = []
+    if chunk:
+        prefetch_related_objects(chunk, 'tags', 'ingredients')
+        yield from chunk
+
+
+def recepi_row(recepi):
+    """Return the recepi in the shape of the recepi detail endpoint"""
+    return {
+        'id': recepi.id,
+        'title': recepi.title,
+        'ingredients': [{'id': ingredient.id, 'name': ingredient.name}
+                        for ingredient in recepi.ingredients.all()],
+        'tags': [{'id': tag.id, 'name': tag.name}
+                 for tag in recepi.tags.all()],
+        'time_minutes': recepi.time_minutes,
+        'price': str(recepi.price),
+        'link': recepi.link,
+    }
+
+
+def ndjson_lines(recepis):
+    """Yield one JSON document per recepi"""
+    for recepi in recepis:
+        yield json.dumps(recepi_row(recepi)) + '\n'
+
+
+def csv_lines(recepis):
+    """Yield a CSV header and one line per recepi, with the tag and
+    ingredient names joined by '|'"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for recepi in recepis:
+        writer.writerow((
+            recepi.id, recepi.title, recepi.time_minutes, recepi.price,
+            recepi.link,
+            '|'.join(tag.name for tag in recepi.tags.all()),
+            '|'.join(item.name for item in recepi.ingredients.all()),
+        ))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks, flush_size=64 * 1024):
+    """Compress a stream of bytes into a gzip stream on the fly"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    pending = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    """Return whether an Accept-Encoding header value accepts gzip, by
+    name or through *, with a q-value above 0"""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+def export(user, output='ndjson', compress=False, chunk_size=1000):
+    """Yield the export of every recepi of user as bytes"""
+    queryset = Recepi.objects.filter(user=user).order_by('id')
+    lines = ndjson_lines if output == 'ndjson' else csv_lines
+    stream = (line.encode('utf-8') for line in lines(
+        iter_recepis(queryset, chunk_size)
+    ))
+
+    return gzip_stream(stream) if compress else stream
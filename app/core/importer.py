@@ -0,0 +1,241 @@
+"""Bulk import of recepis from CSV or JSONL files.
+
+Every row names its user by email and its tags and ingredients by name:
+
+    {"user": "a@b.com", "title": "Curry", "time_minutes": 20,
+     "price": "5.00", "link": "", "tags": ["Vegan"], "ingredients": []}
+
+CSV files use the same columns, with the names joined by '|', which is the
+format `export_recepis --output csv` writes (minus the user column, see
+`default_user`).
+"""
+import csv
+import json
+import time
+import zlib
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from core import bulk
+from core.models import ImportCheckpoint, Tag, Ingredient, Recepi
+
+FORMATS = ('csv', 'jsonl')
+
+
+class RowError(ValueError):
+    """A row of the import file can't be imported"""
+
+
+def _names(value):
+    if isinstance(value, str):
+        value = value.split('|')
+    return list(dict.fromkeys(name.strip() for name in value if name.strip()))
+
+
+def normalize(raw, default_user=None):
+    """Return the row with its values converted, or raise RowError"""
+    try:
+        row = {
+            'user': (raw.get('user') or default_user or '').strip().lower(),
+            'title': raw['title'].strip(),
+            'time_minutes': int(raw['time_minutes']),
+            'price': Decimal(str(raw['price'])),
+            'link': (raw.get('link') or '').strip(),
+            'tags': _names(raw.get('tags') or []),
+            'ingredients': _names(raw.get('ingredients') or []),
+        }
+    except (KeyError, TypeError, ValueError, InvalidOperation) as error:
+        raise RowError('invalid row: %r' % error)
+    if not row['user']:
+        raise RowError('row without user')
+    if not row['title']:
+        raise RowError('row without title')
+
+    return row
+
+
+def read_rows(path, file_format=None):
+    """Yield (line number, raw row) for every row of the file"""
+    if file_format is None:
+        file_format = 'csv' if path.endswith('.csv') else 'jsonl'
+
+    with open(path, newline='', encoding='utf-8') as source:
+        if file_format == 'csv':
+            for number, raw in enumerate(csv.DictReader(source), start=1):
+                yield number, raw
+        else:
+            for number, line in enumerate(source, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except ValueError as error:
+                        yield number, error
+
+
+def worker_for(email, workers):
+    """Return the index of the worker importing the rows of email"""
+    return zlib.crc32(email.encode('utf-8')) % workers
+
+
+class Checkpoint:
+    """Last line committed by a worker, so an import can be resumed.
+
+    The line is saved in the transaction of the batch it ends, so a batch
+    and its checkpoint are committed, or lost, together.
+    """
+
+    def __init__(self, name, worker, workers):
+        self.name = '%s.%d-of-%d' % (name, worker, workers) if name else None
+
+    def load(self):
+        if self.name is None:
+            return 0
+        return ImportCheckpoint.objects.filter(name=self.name).values_list(
+            'line', flat=True
+        ).first() or 0
+
+    def save(self, line):
+        if self.name is None:
+            return
+        ImportCheckpoint.objects.update_or_create(
+            name=self.name, defaults={'line': line}
+        )
+
+
+class Importer:
+    """Import batches of normalized rows.
+
+    Tag, ingredient and user ids are resolved through per-user in-memory
+    dictionaries, missing tags and ingredients are created in bulk, and
+    recepis and their links are inserted with COPY on Postgres and
+    bulk_create elsewhere.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.names = {Tag: {}, Ingredient: {}}
+
+    def user_id(self, email):
+        """Return the id of the user with email, or raise RowError"""
+        if email not in self.users:
+            self.users[email] = get_user_model().objects.filter(
+                email=email
+            ).values_list('id', flat=True).first()
+        if self.users[email] is None:
+            raise RowError('unknown user %s' % email)
+
+        return self.users[email]
+
+    def resolve(self, model, wanted):
+        """Map every (user id, name) in wanted to an id, creating the
+        missing ones in one bulk insert"""
+        known = self.names[model]
+        new_users = {user_id for user_id, _ in wanted} - set(known)
+        if new_users:
+            for user_id in new_users:
+                known[user_id] = {}
+            for pk, user_id, name in model.objects.filter(
+                user_id__in=new_users
+            ).values_list('id', 'user_id', 'name'):
+                known[user_id].setdefault(name, pk)
+
+        missing = [model(user_id=user_id, name=name)
+                   for user_id, name in dict.fromkeys(wanted)
+                   if name not in known[user_id]]
+        for obj in bulk.bulk_create(model, missing):
+            known[obj.user_id][obj.name] = obj.pk
+
+    def import_batch(self, rows):
+        """Insert one batch of (user id, row) in a transaction and return
+        the new recepi ids"""
+        with transaction.atomic():
+            for model, field in ((Tag, 'tags'), (Ingredient, 'ingredients')):
+                self.resolve(model, [(user_id, name)
+                                     for user_id, row in rows
+                                     for name in row[field]])
+
+            recepis = [Recepi(
+                user_id=user_id, title=row['title'],
+                time_minutes=row['time_minutes'], price=row['price'],
+                link=row['link'],
+            ) for user_id, row in rows]
+            insert = bulk.copy if connection.vendor == 'postgresql' \
+                else self._bulk_create
+            insert(recepis)
+
+            for model, field in ((Tag, 'tags'), (Ingredient, 'ingredients')):
+                through = getattr(Recepi, field).through
+                target = getattr(Recepi, field).field.m2m_reverse_field_name()
+                insert([through(**{
+                    'recepi_id': recepi.pk,
+                    target + '_id': self.names[model][user_id][name],
+                }) for recepi, (user_id, row) in zip(recepis, rows)
+                    for name in row[field]])
+
+        return [recepi.pk for recepi in recepis]
+
+    def _bulk_create(self, objs):
+        if objs:
+            bulk.bulk_create(
+                type(objs[0]), objs, fetch_pks=isinstance(objs[0], Recepi)
+            )
+
+
+def run(path, file_format=None, default_user=None, batch_size=5000,
+        worker=0, workers=1, checkpoint=None, after_batch=None, log=None):
+    """Import the rows of path that belong to worker and return the stats.
+
+    Batches are committed one by one together with the checkpoint of
+    their last line, so running again with the same checkpoint resumes.
+    `after_batch(recepi_ids, user_ids)` runs in the transaction of every
+    batch, e.g. to index the new recepis.
+    """
+    checkpoint = Checkpoint(checkpoint, worker, workers)
+    resume_after = checkpoint.load()
+    importer = Importer()
+    stats = {'worker': worker, 'rows': 0, 'errors': 0}
+    start = time.perf_counter()
+    batch, last_line = [], resume_after
+
+    def flush():
+        with transaction.atomic():
+            ids = importer.import_batch(batch)
+            if after_batch:
+                after_batch(ids, {user_id for user_id, _ in batch})
+            checkpoint.save(last_line)
+        stats['rows'] += len(batch)
+        if log:
+            log('worker %d: %d rows (%.0f rows/sec)' % (
+                worker, stats['rows'],
+                stats['rows'] / (time.perf_counter() - start)
+            ))
+        batch.clear()
+
+    for number, raw in read_rows(path, file_format):
+        if number <= resume_after:
+            continue
+        try:
+            if isinstance(raw, Exception):
+                raise RowError('invalid JSON: %s' % raw)
+            row = normalize(raw, default_user)
+            if worker_for(row['user'], workers) != worker:
+                continue
+            batch.append((importer.user_id(row['user']), row))
+        except RowError as error:
+            stats['errors'] += 1
+            if log:
+                log('line %d: %s' % (number, error))
+            continue
+        last_line = number
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] \
+        if stats['seconds'] else 0
+
+    return stats
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import export
+
+
+class Command(BaseCommand):
+    """Django command to stream the recepis of a user to a file"""
+    help = 'Export the recepis of a user as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the user to export')
+        parser.add_argument('--output', choices=export.FORMATS,
+                            default='ndjson')
+        parser.add_argument('--file', help='Write here instead of stdout')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Compress the export with gzip')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['file']:
+            raise CommandError('--gzip needs --file')
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError('No user with email %s' % options['email'])
+
+        stream = export.export(
+            user, options['output'], options['gzip'], options['chunk_size']
+        )
+        if options['file']:
+            with open(options['file'], 'wb') as out:
+                for chunk in stream:
+                    out.write(chunk)
+        else:
+            for chunk in stream:
+                self.stdout.write(chunk.decode('utf-8'), ending='')
@@ -0,0 +1,73 @@
+import multiprocessing
+import sys
+
+from django.core.management.base import BaseCommand, OutputWrapper
+from django.db import connections
+
+from core import importer
+from recepi import search, versions
+
+
+def index_batch(recepi_ids, user_ids):
+    """Index the imported recepis and expire the cached lists of their
+    users"""
+    search.reindex(recepi_ids)
+    for user_id in user_ids:
+        versions.bump(user_id)
+
+
+def _run_worker(kwargs):
+    """Entry point of a forked worker process"""
+    # the command's stdout can't be passed to the pool
+    return importer.run(log=OutputWrapper(sys.stdout).write, **kwargs)
+
+
+class Command(BaseCommand):
+    """Django command to bulk import recepis from a CSV or JSONL file"""
+    help = 'Import recepis, creating missing tags and ingredients'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--format', choices=importer.FORMATS,
+                            dest='file_format',
+                            help='Defaults to the file extension')
+        parser.add_argument('--user', dest='default_user',
+                            help='Email of the user of rows without one')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes, each importing a share of '
+                                 'the users')
+        parser.add_argument('--checkpoint',
+                            help='Resume from and record progress under '
+                                 'this name')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        jobs = [{
+            'path': options['path'],
+            'file_format': options['file_format'],
+            'default_user': options['default_user'],
+            'batch_size': options['batch_size'],
+            'worker': worker,
+            'workers': workers,
+            'checkpoint': options['checkpoint'],
+            'after_batch': index_batch,
+        } for worker in range(workers)]
+
+        if workers == 1:
+            results = [importer.run(log=self.stdout.write, **jobs[0])]
+        else:
+            # forked workers must open their own connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                results = pool.map(_run_worker, jobs)
+
+        rows = sum(result['rows'] for result in results)
+        errors = sum(result['errors'] for result in results)
+        seconds = max(result['seconds'] for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d rows (%d errors) in %.1fs, %.0f rows/sec' % (
+                rows, errors, seconds, rows / seconds if seconds else 0
+            )
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seed
+from recepi import search
+
+
+class Command(BaseCommand):
+    """Django command to fill the database with synthetic recepis"""
+    help = 'Create users with skewed amounts of tags, ingredients ' \
+           'and recepis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recepis-per-user', type=int, default=50,
+                            help='Average recepis per user')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, the same seed gives the '
+                                 'same data')
+        parser.add_argument('--password', default='password',
+                            help='Password of every seeded user')
+        parser.add_argument('--email', default='seed%d@example.com',
+                            help='Email pattern of the users')
+        parser.add_argument('--batch-size', type=int, default=20000,
+                            help='Recepis inserted per transaction')
+        parser.add_argument('--no-search-index', dest='index',
+                            action='store_false',
+                            help='Skip building the search documents')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['recepis_per_user'] < 0:
+            raise CommandError('Expected at least one user')
+        if '%d' not in options['email']:
+            raise CommandError('--email must contain %d')
+
+        try:
+            stats = seed.run(
+                options['users'], options['recepis_per_user'],
+                seed=options['seed'], password=options['password'],
+                batch_size=options['batch_size'], email=options['email'],
+                after_batch=search.reindex if options['index'] else None,
+                log=self.stdout.write,
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        seconds = stats['seconds']
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded %d users and %d recepis in %.1fs, %.0f recepis/sec' % (
+                stats['users'], stats['recepis'], seconds,
+                stats['recepis'] / seconds if seconds else 0
+            )
+        ))
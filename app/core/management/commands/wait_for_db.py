@@ -1,20 +1,98 @@
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
-    """dJANGO COMMAND TO PAUSE EXECUTING UNTIL DATABSE IS AVAILABLE"""
+    """Django command to pause execution until the databases are available.
+
+    Every alias is probed in its own thread by opening a connection and
+    running `SELECT 1`, retrying with exponential backoff and jitter until
+    it answers or the timeout runs out.
+    """
+    help = 'Wait until the databases accept queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Database alias to wait for, can be repeated '
+                 '(default: default)',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60.0,
+            help='Seconds to wait before giving up, 0 waits forever',
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failed attempt',
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5.0,
+            help='Upper bound of the delay between attempts',
+        )
+
     def handle(self, *args, **options):
+        aliases = list(dict.fromkeys(options['databases'] or ['default']))
+        for alias in aliases:
+            if alias not in connections.databases:
+                raise CommandError('Unknown database %s' % alias)
+        start = time.monotonic()
+        deadline = start + options['timeout'] if options['timeout'] else None
+
         self.stdout.write('Waiting for db...')
-        db_conn = None
-        while not db_conn:
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            results = list(executor.map(lambda alias: self.probe(
+                alias, start, deadline,
+                options['initial_delay'], options['max_delay'],
+            ), aliases))
+
+        unavailable = [alias for alias, ready in zip(aliases, results)
+                       if ready is None]
+        if unavailable:
+            raise CommandError('Database unavailable after %.1fs: %s' % (
+                time.monotonic() - start, ', '.join(unavailable)
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            'Database is available! (%.2fs)' % max(results)
+        ))
+
+    def probe(self, alias, start, deadline, initial_delay, max_delay):
+        """Return the seconds alias took to answer, or None on timeout"""
+        attempt = 0
+        while True:
+            attempt += 1
+            connection = connections[alias]
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            except OperationalError as error:
+                delay = min(max_delay, initial_delay * 2 ** (attempt - 1))
+                # equal jitter, so restarted containers don't probe in step
+                delay = delay / 2 + random.uniform(0, delay / 2)
+                if deadline is not None and \
+                        time.monotonic() + delay > deadline:
+                    self.stdout.write('Database %s unavailable: %s' % (
+                        alias, str(error).strip()
+                    ))
+                    return None
+                self.stdout.write(
+                    'Database %s unavailable, waiting %.2f seconds...' % (
+                        alias, delay
+                    )
+                )
+                time.sleep(delay)
+                continue
+            finally:
+                # the connection belongs to the probing thread
+                connection.close()
 
-        self.stdout.write(self.style.SUCCESS('Database is available!'))
+            elapsed = time.monotonic() - start
+            self.stdout.write('Database %s ready after %.2fs (%d attempts)' % (
+                alias, elapsed, attempt
+            ))
+            return elapsed
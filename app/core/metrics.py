@@ -0,0 +1,116 @@
+"""In-process metrics registry"""
+import threading
+
+_lock = threading.Lock()
+registry = {}
+
+
+class Counter:
+    """Monotonically increasing value"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Increase the counter by amount"""
+        with self._lock:
+            self.value += amount
+
+
+def counter(name, documentation=''):
+    """Return the counter registered under name, creating it if needed"""
+    with _lock:
+        if name not in registry:
+            registry[name] = Counter(name, documentation)
+        return registry[name]
+
+
+# Prometheus' default buckets, in seconds
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5,
+                   5.0, 7.5, 10.0)
+
+
+class Histogram:
+    """Distribution of observed values, per combination of label values"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Record value for the given label values"""
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = \
+                    [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        """Yield (suffix, labels, value) in the Prometheus layout"""
+        with self._lock:
+            series = [(labels, list(counts), total, count) for
+                      labels, (counts, total, count) in self.series.items()]
+        for labels, counts, total, count in sorted(series):
+            labels = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                yield '_bucket', labels + [('le', repr(bound))], cumulative
+            yield '_bucket', labels + [('le', '+Inf')], count
+            yield '_sum', labels, total
+            yield '_count', labels, count
+
+
+def histogram(name, documentation='', labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Return the histogram registered under name, creating it if needed"""
+    with _lock:
+        if name not in registry:
+            registry[name] = Histogram(
+                name, documentation, labelnames, buckets
+            )
+        return registry[name]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n') \
+        .replace('"', '\\"')
+
+
+def exposition():
+    """Return the registry in the Prometheus text format"""
+    lines = []
+    for name in sorted(registry):
+        metric = registry[name]
+        if metric.documentation:
+            lines.append('# HELP %s %s' % (
+                name, metric.documentation.replace('\n', ' ')
+            ))
+        lines.append('# TYPE %s %s' % (name, metric.kind))
+        if metric.kind == 'counter':
+            lines.append('%s %r' % (name, float(metric.value)))
+            continue
+        for suffix, labels, value in metric.samples():
+            label_text = ','.join(
+                '%s="%s"' % (label, _escape(text)) for label, text in labels
+            )
+            lines.append('%s%s{%s} %r' % (
+                name, suffix, label_text, float(value)
+            ) if label_text else '%s%s %r' % (name, suffix, float(value)))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,201 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics, routers, timing
+from core.slowqueries import recorder
+from core.views import metrics_allowed
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LABELS = ('view', 'method')
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Total latency of the requests', LABELS
+)
+REQUEST_DB_SECONDS = metrics.histogram(
+    'http_request_db_seconds', 'Time spent in database queries', LABELS
+)
+REQUEST_DB_QUERIES = metrics.histogram(
+    'http_request_db_queries', 'Database queries per request', LABELS,
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_SERIALIZE_SECONDS = metrics.histogram(
+    'http_request_serialize_seconds', 'Time spent in serializers', LABELS
+)
+REQUEST_RENDER_SECONDS = metrics.histogram(
+    'http_request_render_seconds', 'Time spent rendering responses', LABELS
+)
+
+
+def view_name(view_func):
+    """Return the dotted label of a view, e.g. recepi.views.RecepiViewSet"""
+    return '%s.%s' % (view_func.__module__, view_func.__name__)
+
+
+class ReplicaMiddleware:
+    """Serve safe API requests from a read replica.
+
+    A successful write pins the client to the primary for
+    REPLICA_PIN_SECONDS, through a cookie and a response header that
+    clients without cookies can send back, so they read their own writes
+    while the replicas catch up.
+    """
+    cookie_name = 'db_pin'
+    header_name = 'X-DB-Pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        alias = routers.choose_replica() if self.use_replica(request) \
+            else None
+        with routers.read_from(alias):
+            response = self.get_response(request)
+
+        if request.method not in SAFE_METHODS and \
+                response.status_code < 400:
+            self.pin(response)
+
+        return response
+
+    def use_replica(self, request):
+        """Return whether the reads of request may go to a replica"""
+        if request.method not in SAFE_METHODS:
+            return False
+        paths = getattr(settings, 'REPLICA_PATHS', ())
+        if not request.path.startswith(tuple(paths)):
+            return False
+
+        return not self.is_pinned(request)
+
+    def is_pinned(self, request):
+        """Return whether the client wrote within the pin window"""
+        header = 'HTTP_' + self.header_name.upper().replace('-', '_')
+        for value in (request.COOKIES.get(self.cookie_name),
+                      request.META.get(header)):
+            try:
+                if value and float(value) > time.time():
+                    return True
+            except ValueError:
+                continue
+
+        return False
+
+    def pin(self, response):
+        """Pin the client to the primary for the pin window"""
+        seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        until = '%.3f' % (time.time() + seconds)
+        response.set_cookie(
+            self.cookie_name, until, max_age=seconds, httponly=True
+        )
+        response[self.header_name] = until
+
+
+class TimingMiddleware:
+    """Time the requests to the API views.
+
+    A REQUEST_TIMING_SAMPLE_RATE share of the requests is timed: their
+    database queries through connection.execute_wrapper(), and the
+    serialize and render phases through core.timing spans. Requests to
+    views of REQUEST_TIMING_VIEW_MODULES are recorded in the histograms
+    served at /metrics, and get a Server-Timing header when they come
+    from a staff user or one of METRICS_ALLOWED_IPS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 1.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        with timing.timed_request() as request_timing, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    request_timing.execute_wrapper
+                ))
+            response = self.get_response(request)
+        request_timing.add('total', time.perf_counter() - request_timing.start)
+
+        view = getattr(request, 'timing_view', None)
+        if view is not None:
+            self.record(request_timing, view, request.method)
+            if self.show_timing(request):
+                response['Server-Timing'] = request_timing.server_timing()
+
+        return response
+
+    def show_timing(self, request):
+        """Return whether the client may see the timing of its request,
+        it tells how many queries a view runs"""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        return metrics_allowed(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        modules = getattr(settings, 'REQUEST_TIMING_VIEW_MODULES', ())
+        if timing.current() is not None and view_func.__module__ in modules:
+            request.timing_view = view_name(view_func)
+
+    def record(self, request_timing, view, method):
+        """Add the timing of a request to the histograms"""
+        spans = request_timing.spans
+        REQUEST_SECONDS.observe(spans['total'], view, method)
+        REQUEST_DB_SECONDS.observe(spans.get('db', 0.0), view, method)
+        REQUEST_DB_QUERIES.observe(request_timing.queries, view, method)
+        REQUEST_SERIALIZE_SECONDS.observe(
+            spans.get('serialize', 0.0), view, method
+        )
+        REQUEST_RENDER_SECONDS.observe(spans.get('render', 0.0), view, method)
+
+
+class SlowQueryMiddleware:
+    """Record the queries slower than SLOW_QUERY_THRESHOLD_MS.
+
+    The queries are timed through connection.execute_wrapper(), and the
+    slow ones are handed to core.slowqueries.recorder with the view that
+    ran them once the response is built. A threshold of None turns the
+    capture off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+        if threshold is None:
+            return self.get_response(request)
+
+        slow = []
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    self.wrapper(connection.alias, threshold, slow)
+                ))
+            response = self.get_response(request)
+
+        if slow:
+            recorder.submit(getattr(request, 'slow_query_view', ''), slow)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.slow_query_view = view_name(view_func)
+
+    @staticmethod
+    def wrapper(alias, threshold, slow):
+        def execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                milliseconds = (time.perf_counter() - start) * 1000
+                if milliseconds >= threshold and not many:
+                    slow.append((alias, sql, params, milliseconds))
+
+        return execute
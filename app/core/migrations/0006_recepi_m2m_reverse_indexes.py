@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Covering (target, recepi) indexes on the auto-created through
+    tables, so filtering recepis by tag or ingredient ids is index-only"""
+
+    dependencies = [
+        ('core', '0005_composite_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ['CREATE INDEX core_recepi_tags_tag_recepi_idx '
+             'ON core_recepi_tags (tag_id, recepi_id)'],
+            ['DROP INDEX core_recepi_tags_tag_recepi_idx'],
+        ),
+        migrations.RunSQL(
+            ['CREATE INDEX core_recepi_ingr_ingr_recepi_idx '
+             'ON core_recepi_ingredients (ingredient_id, recepi_id)'],
+            ['DROP INDEX core_recepi_ingr_ingr_recepi_idx'],
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'ALTER TABLE core_recepi ADD COLUMN search_vector tsvector',
+    "UPDATE core_recepi r SET search_vector = "
+    "setweight(to_tsvector('english', r.title), 'A') || "
+    "setweight(to_tsvector('english', coalesce((SELECT string_agg(t.name, ' ') "
+    "FROM core_tag t INNER JOIN core_recepi_tags rt ON rt.tag_id = t.id "
+    "WHERE rt.recepi_id = r.id), '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce((SELECT string_agg(i.name, ' ') "
+    "FROM core_ingredient i "
+    "INNER JOIN core_recepi_ingredients ri ON ri.ingredient_id = i.id "
+    "WHERE ri.recepi_id = r.id), '')), 'C')",
+    'CREATE INDEX core_recepi_search_vector_idx '
+    'ON core_recepi USING gin (search_vector)',
+]
+POSTGRES_REVERSE = [
+    'DROP INDEX core_recepi_search_vector_idx',
+    'ALTER TABLE core_recepi DROP COLUMN search_vector',
+]
+
+SQLITE_FORWARD = [
+    'CREATE VIRTUAL TABLE core_recepi_search '
+    'USING fts5(title, tags, ingredients)',
+    "INSERT INTO core_recepi_search (rowid, title, tags, ingredients) "
+    "SELECT r.id, r.title, coalesce((SELECT group_concat(t.name, ' ') "
+    "FROM core_tag t INNER JOIN core_recepi_tags rt ON rt.tag_id = t.id "
+    "WHERE rt.recepi_id = r.id), ''), coalesce((SELECT "
+    "group_concat(i.name, ' ') FROM core_ingredient i "
+    "INNER JOIN core_recepi_ingredients ri ON ri.ingredient_id = i.id "
+    "WHERE ri.recepi_id = r.id), '') FROM core_recepi r",
+]
+SQLITE_REVERSE = [
+    'DROP TABLE core_recepi_search',
+]
+
+
+def run(statements):
+    """Run the statements for the current database vendor"""
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+    """Search document of the recepis, outside of the django model:
+    a GIN indexed tsvector column on Postgres, a FTS5 table on SQLite"""
+
+    dependencies = [
+        ('core', '0006_recepi_m2m_reverse_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
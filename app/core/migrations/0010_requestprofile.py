@@ -0,0 +1,27 @@
+# Generated by Django 2.1.15 on 2026-10-18 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.TextField()),
+                ('user', models.CharField(max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('seconds', models.FloatField()),
+                ('calls', models.PositiveIntegerField()),
+                ('summary', models.TextField()),
+                ('dump', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -48,6 +48,15 @@ class Tag(models.Model):
         on_delete = models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            # matches the keyset ordering of the tags list endpoint
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
 
         return self.name
@@ -61,6 +70,15 @@ class Ingredient(models.Model):
         on_delete = models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            # matches the keyset ordering of the ingredients list endpoint
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingredient_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
 
         return self.name
@@ -79,5 +97,60 @@ class Recepi(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
 
+    class Meta:
+        indexes = [
+            # matches the keyset ordering of the recepis list endpoint
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recepi_user_id_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.title
+
+
+class SlowQuery(models.Model):
+    """Queries slower than SLOW_QUERY_THRESHOLD_MS, aggregated by the
+    fingerprint of their SQL and the view that ran them"""
+    fingerprint = models.CharField(max_length=40)
+    view = models.CharField(max_length=255, blank=True)
+    sql = models.TextField()
+    example = models.TextField(blank=True)
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    explain = models.TextField(blank=True)
+    explained_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('fingerprint', 'view')
+
+    def __str__(self):
+        return self.sql[:80]
+
+
+class ImportCheckpoint(models.Model):
+    """Last line of an import file committed by an import worker"""
+    name = models.CharField(max_length=255, unique=True)
+    line = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s: %d' % (self.name, self.line)
+
+
+class RequestProfile(models.Model):
+    """A staff request profiled with cProfile, see core.profiling"""
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    user = models.CharField(max_length=255)
+    created = models.DateTimeField(auto_now_add=True)
+    seconds = models.FloatField()
+    calls = models.PositiveIntegerField()
+    summary = models.TextField()
+    dump = models.BinaryField()
+
+    def __str__(self):
+        return '%s %s' % (self.method, self.path)
@@ -0,0 +1,118 @@
+"""Profile single API requests of staff users with cProfile.
+
+A staff user adds `?_profile=1` (or the `X-Profile: 1` header) to a
+request of a view using `ProfilingMixin`. The view then runs from the
+end of authentication through the handler, the serializers and the
+rendering under cProfile. The result is stored as a `RequestProfile`
+row, shared by every worker, and the id of the profile is returned in
+the X-Profile-Id header. Only the latest PROFILE_BUFFER_SIZE rows are
+kept, browsable at /admin/profiles/.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+
+from django.conf import settings
+
+from core.models import RequestProfile
+
+
+class ProfileStore:
+    """The latest profiles, in the RequestProfile table"""
+
+    def __init__(self, size):
+        self.size = size
+
+    def add(self, request, profiler, seconds):
+        """Summarize a finished profiler and keep it"""
+        out = io.StringIO()
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats('cumulative').print_stats(
+            getattr(settings, 'PROFILE_TOP_N', 40)
+        )
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path(),
+            user=str(request.user),
+            seconds=seconds,
+            calls=stats.total_calls,
+            summary=out.getvalue(),
+            # the content of a file written by pstats.Stats.dump_stats()
+            dump=marshal.dumps(stats.stats),
+        )
+
+        stale = RequestProfile.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[self.size:self.size + 1]
+        if stale:
+            RequestProfile.objects.filter(pk__lte=stale[0]).delete()
+
+        return profile
+
+    def all(self):
+        """Return the kept profiles, newest first"""
+        return list(RequestProfile.objects.defer('dump').order_by('-pk'))
+
+    def get(self, pk):
+        """Return the profile pk, or None if it was dropped"""
+        return RequestProfile.objects.filter(pk=pk).first()
+
+    def clear(self):
+        RequestProfile.objects.all().delete()
+
+
+store = ProfileStore(getattr(settings, 'PROFILE_BUFFER_SIZE', 50))
+
+
+class ProfilingMixin:
+    """Profile the requests of staff users that ask for it"""
+    profile_query_param = '_profile'
+    profile_header = 'HTTP_X_PROFILE'
+    _profiler = None
+
+    def wants_profile(self, request):
+        """Return whether request is a profiling request of a staff user"""
+        if not getattr(settings, 'PROFILE_REQUESTS_ENABLED', True):
+            return False
+        flag = request.query_params.get(self.profile_query_param) or \
+            request.META.get(self.profile_header)
+
+        return flag in ('1', 'true') and request.user.is_staff
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # the user is only known once authentication ran
+        if self.wants_profile(request):
+            self._profile_start = time.perf_counter()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        profiler = self._profiler
+        if profiler is None:
+            return response
+
+        if not getattr(response, 'is_rendered', True):
+            response.render()
+        profiler.disable()
+        self._profiler = None
+        profile = store.add(
+            request, profiler, time.perf_counter() - self._profile_start
+        )
+        response['X-Profile-Id'] = str(profile.pk)
+
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._profiler is not None:
+                # an exception escaped before the response was finalized
+                self._profiler.disable()
+                self._profiler = None
@@ -0,0 +1,30 @@
+import orjson
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import timing
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer writing bytes directly with orjson.
+
+    Types orjson doesn't know (Decimal, lazy translation strings, querysets,
+    ...) and datetimes go through DRF's encoder so the output matches
+    JSONRenderer.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+
+        options = self.options
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent:
+            # orjson only knows how to indent by two spaces
+            options |= orjson.OPT_INDENT_2
+
+        with timing.span('render'):
+            return orjson.dumps(data, default=self.default, option=options)
@@ -0,0 +1,106 @@
+"""Send the reads of safe requests to the read replicas.
+
+`core.middleware.ReplicaMiddleware` picks a replica for each GET/HEAD
+request on the API and `ReplicaRouter` sends the reads of that request to
+it. Everything else, including every write and the reads that follow a
+write, goes to the primary (`default`).
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+PRIMARY = 'default'
+
+POSTGRES_LAG = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+_state = threading.local()
+_lag = {}
+
+
+def replicas():
+    """Return the configured replica aliases"""
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', ())
+            if alias in connections.databases]
+
+
+def replica_lag(alias):
+    """Return how many seconds alias is behind the primary, inf if down"""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                # nothing replicates into other backends
+                cursor.execute('SELECT 1')
+                return 0.0
+            cursor.execute(POSTGRES_LAG)
+            return float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        return float('inf')
+
+
+def current_lag(alias):
+    """Return the lag of alias, measured at most once per check interval"""
+    interval = getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 1.0)
+    now = time.monotonic()
+    checked_at, lag = _lag.get(alias, (None, None))
+    if checked_at is None or now - checked_at >= interval:
+        lag = replica_lag(alias)
+        _lag[alias] = (now, lag)
+
+    return lag
+
+
+def choose_replica():
+    """Return a replica close enough to the primary, or None"""
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5.0)
+    candidates = [alias for alias in replicas()
+                  if current_lag(alias) <= max_lag]
+
+    return random.choice(candidates) if candidates else None
+
+
+def read_alias():
+    """Return the replica the reads of this thread go to, None for the
+    primary"""
+    return getattr(_state, 'alias', None)
+
+
+@contextmanager
+def read_from(alias):
+    """Send the reads of the block to alias (None for the primary)"""
+    previous = getattr(_state, 'alias', None)
+    _state.alias = alias
+    try:
+        yield
+    finally:
+        _state.alias = previous
+
+
+class ReplicaRouter:
+    """Route reads to the replica picked for the current request"""
+
+    def db_for_read(self, model, **hints):
+        return read_alias() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # read your own writes for the rest of the request
+        _state.alias = None
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replicas get the schema from the primary
+        return db not in replicas()
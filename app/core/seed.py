@@ -0,0 +1,215 @@
+"""Synthetic users, tags, ingredients and recepis for local load testing.
+
+The data is skewed the way real usage is: recepis are spread over the
+users with Pareto weights, so a few users own most of them, and every
+recepi picks its tags and ingredients with Zipf weights, so a few of each
+user's ingredients are in most of the recepis. Everything is drawn from
+one `random.Random(seed)` user by user, so the same options always give
+the same rows whatever the batch size.
+"""
+import itertools
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from core import bulk
+from core.models import Tag, Ingredient, Recepi
+
+TAGS = (
+    'Vegan', 'Vegetarian', 'Dessert', 'Breakfast', 'Dinner', 'Lunch',
+    'Quick', 'Spicy', 'Gluten free', 'Comfort food', 'Healthy', 'Party',
+    'Kids', 'Summer', 'Winter', 'Baking', 'Grill', 'One pot', 'Budget',
+    'Festive',
+)
+INGREDIENTS = (
+    'Salt', 'Olive oil', 'Garlic', 'Onion', 'Butter', 'Flour', 'Sugar',
+    'Eggs', 'Milk', 'Black pepper', 'Tomato', 'Lemon', 'Rice', 'Chicken',
+    'Potato', 'Carrot', 'Cheese', 'Cream', 'Ginger', 'Chili', 'Basil',
+    'Parsley', 'Cumin', 'Paprika', 'Beef', 'Pasta', 'Spinach', 'Mushroom',
+    'Coconut milk', 'Soy sauce', 'Honey', 'Yogurt', 'Beans', 'Lentils',
+    'Cinnamon', 'Bacon', 'Salmon', 'Avocado', 'Bell pepper', 'Chickpeas',
+)
+ADJECTIVES = ('Spicy', 'Creamy', 'Quick', 'Roasted', 'Classic', 'Smoky',
+              'Zesty', 'Rustic', 'Easy', 'Crispy', 'Sticky', 'Herby')
+DISHES = ('Curry', 'Stew', 'Salad', 'Soup', 'Pie', 'Tacos', 'Risotto',
+          'Pasta', 'Stir fry', 'Bowl', 'Cake', 'Bread', 'Traybake')
+
+TAGS_PER_USER = 8
+INGREDIENTS_PER_USER = 30
+# Pareto shape of the recepis per user, lower is more skewed
+USER_SKEW = 1.2
+
+
+def zipf_weights(count):
+    """Return the cumulative Zipf weights of count ranked items"""
+    return list(itertools.accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+def distribute(total, users, rng):
+    """Split total recepis over users with Pareto weights"""
+    weights = [rng.paretovariate(USER_SKEW) for _ in range(users)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    # hand the rounding leftovers to the heaviest users
+    heaviest = sorted(range(users), key=lambda index: -weights[index])
+    for index in heaviest[:total - sum(counts)]:
+        counts[index] += 1
+
+    return counts
+
+
+def pick(rng, cum_weights, low, high):
+    """Return between low and high distinct Zipf-weighted indexes"""
+    wanted = rng.randint(low, high)
+    picked = rng.choices(
+        range(len(cum_weights)), cum_weights=cum_weights, k=wanted * 2
+    )
+
+    return list(dict.fromkeys(picked))[:wanted]
+
+
+def generate_user(recepis, rng):
+    """Return the tag names, ingredient names and recepis of a user"""
+    tags = rng.sample(TAGS, TAGS_PER_USER)
+    ingredients = rng.sample(INGREDIENTS, INGREDIENTS_PER_USER)
+    tag_weights = zipf_weights(len(tags))
+    ingredient_weights = zipf_weights(len(ingredients))
+    rows = []
+    for _ in range(recepis):
+        linked = pick(rng, ingredient_weights, 3, 9)
+        rows.append({
+            'title': '%s %s %s' % (rng.choice(ADJECTIVES),
+                                   ingredients[linked[0]].lower(),
+                                   rng.choice(DISHES).lower()),
+            'time_minutes': max(1, int(rng.lognormvariate(3.2, 0.5))),
+            'price': Decimal('%.2f' % min(rng.lognormvariate(1.8, 0.6),
+                                          999.99)),
+            'link': 'https://example.com/r/%d' % rng.randrange(10 ** 9)
+            if rng.random() < 0.2 else '',
+            'tags': pick(rng, tag_weights, 1, 3),
+            'ingredients': linked,
+        })
+
+    return {'tags': tags, 'ingredients': ingredients, 'recepis': rows}
+
+
+class Seeder:
+    """Insert generated users in one transaction per batch"""
+
+    def __init__(self, password_hash, email='seed%d@example.com'):
+        self.password_hash = password_hash
+        self.email = email
+        if connection.vendor == 'postgresql':
+            self.insert = bulk.copy
+        else:
+            self.insert = self._bulk_create
+
+    @staticmethod
+    def _bulk_create(objs):
+        if objs:
+            bulk.bulk_create(type(objs[0]), objs)
+        return objs
+
+    def link(self, field, pairs):
+        """Insert the (recepi id, related id) pairs of a relation"""
+        through = getattr(Recepi, field).through
+        target = getattr(Recepi, field).field.m2m_reverse_field_name()
+        if self.insert is bulk.copy:
+            bulk.copy(through(**{'recepi_id': recepi_id, target + '_id': pk})
+                      for recepi_id, pk in pairs)
+        else:
+            columns = [through._meta.get_field(name).column
+                       for name in ('recepi', target)]
+            bulk.insert_rows(through, columns, pairs)
+
+    def insert_batch(self, batch):
+        """Insert [(user number, generated data)] and return the recepi
+        ids"""
+        User = get_user_model()
+        with transaction.atomic():
+            users = self.insert([User(
+                email=self.email % number, name='Seed user %d' % number,
+                password=self.password_hash,
+            ) for number, _ in batch])
+
+            names = {}
+            for model, field in ((Tag, 'tags'), (Ingredient, 'ingredients')):
+                objs = self.insert([
+                    model(user_id=user.pk, name=name)
+                    for user, (_, data) in zip(users, batch)
+                    for name in data[field]
+                ])
+                names[field] = iter(obj.pk for obj in objs)
+
+            recepis, links = [], {'tags': [], 'ingredients': []}
+            for user, (_, data) in zip(users, batch):
+                pks = {field: [next(names[field]) for _ in data[field]]
+                       for field in links}
+                for row in data['recepis']:
+                    recepis.append(Recepi(
+                        user_id=user.pk, title=row['title'],
+                        time_minutes=row['time_minutes'],
+                        price=row['price'], link=row['link'],
+                    ))
+                    for field in links:
+                        links[field].append(
+                            [pks[field][index] for index in row[field]]
+                        )
+            self.insert(recepis)
+
+            for field, related in links.items():
+                self.link(field, [(recepi.pk, pk) for recepi, pks
+                                  in zip(recepis, related) for pk in pks])
+
+        return [recepi.pk for recepi in recepis]
+
+
+def run(users, recepis_per_user, seed=0, password='password',
+        batch_size=20000, email='seed%d@example.com', after_batch=None,
+        log=None):
+    """Seed users owning users * recepis_per_user recepis, return stats.
+
+    `after_batch(recepi_ids)` runs after every batch, e.g. to index the
+    new recepis.
+    """
+    if get_user_model().objects.filter(email=email % 0).exists():
+        raise ValueError(
+            '%s already exists, seed with another email' % (email % 0)
+        )
+
+    rng = random.Random(seed)
+    counts = distribute(users * recepis_per_user, users, rng)
+    # hashing is slow on purpose, so all users share one hash
+    seeder = Seeder(make_password(password), email)
+    stats = {'users': 0, 'recepis': 0}
+    start = time.perf_counter()
+    batch, batch_recepis = [], 0
+
+    def flush():
+        ids = seeder.insert_batch(batch)
+        if after_batch:
+            after_batch(ids)
+        stats['users'] += len(batch)
+        stats['recepis'] += len(ids)
+        if log:
+            log('%d users, %d recepis (%.0f recepis/sec)' % (
+                stats['users'], stats['recepis'],
+                stats['recepis'] / (time.perf_counter() - start)
+            ))
+        batch.clear()
+
+    for number, count in enumerate(counts):
+        batch.append((number, generate_user(count, rng)))
+        batch_recepis += count
+        if batch_recepis >= batch_size or len(batch) >= batch_size:
+            flush()
+            batch_recepis = 0
+    if batch:
+        flush()
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
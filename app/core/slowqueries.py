@@ -0,0 +1,158 @@
+"""Capture the queries slower than SLOW_QUERY_THRESHOLD_MS.
+
+`core.middleware.SlowQueryMiddleware` times every query of a request
+through connection.execute_wrapper() and hands the slow ones to the
+`recorder` once the response is built. The recorder runs in a background
+thread (unless SLOW_QUERY_ASYNC is off). It logs each query to the
+`core.slowqueries` logger and adds it to the `SlowQuery` row of its
+fingerprint and view. On Postgres it also stores the
+`EXPLAIN (ANALYZE, BUFFERS)` of SELECTs, at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL per row.
+"""
+import hashlib
+import logging
+import queue
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, \
+    transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+DROPPED = metrics.counter(
+    'slow_queries_dropped_total',
+    'Slow queries not recorded because the recorder queue was full'
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """Return sql with its literals and parameters replaced by ?"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Return the hash shared by the queries that only differ by values"""
+    return hashlib.sha1(normalize(sql).encode('utf-8')).hexdigest()
+
+
+def redact(text, params):
+    """Replace the string params quoted in text, e.g. in the filters of a
+    plan, with ?"""
+    for param in params or ():
+        if isinstance(param, str) and param:
+            text = text.replace(param, '?')
+
+    return text
+
+
+def explain(alias, sql, params):
+    """Return the EXPLAIN (ANALYZE, BUFFERS) of a Postgres SELECT, or None"""
+    connection = connections[alias]
+    statement = sql.lstrip().upper()
+    if connection.vendor != 'postgresql' or \
+            not statement.startswith('SELECT') or 'FOR UPDATE' in statement:
+        # ANALYZE runs the statement, only do that for reads
+        return None
+
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, params)
+            return redact(
+                '\n'.join(row[0] for row in cursor.fetchall()), params
+            )
+    except DatabaseError as error:
+        return 'EXPLAIN failed: %s' % error
+
+
+class Recorder:
+    """Aggregate slow queries into the SlowQuery table"""
+
+    def __init__(self):
+        self.queue = None
+        self._lock = threading.Lock()
+
+    def submit(self, view, queries):
+        """Record [(alias, sql, params, milliseconds)] run by view"""
+        if not getattr(settings, 'SLOW_QUERY_ASYNC', True):
+            self.record(view, queries)
+            return
+
+        self._start()
+        try:
+            self.queue.put_nowait((view, queries))
+        except queue.Full:
+            DROPPED.inc(len(queries))
+
+    def _start(self):
+        with self._lock:
+            if self.queue is None:
+                self.queue = queue.Queue(
+                    getattr(settings, 'SLOW_QUERY_QUEUE_SIZE', 1000)
+                )
+                threading.Thread(
+                    target=self._run, name='slow-query-recorder', daemon=True
+                ).start()
+
+    def _run(self):
+        while True:
+            view, queries = self.queue.get()
+            close_old_connections()
+            try:
+                self.record(view, queries)
+            except Exception:
+                logger.exception('Could not record slow queries')
+
+    def record(self, view, queries):
+        from core.models import SlowQuery
+
+        interval = timedelta(
+            seconds=getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 3600)
+        )
+        for alias, sql, params, milliseconds in queries:
+            normalized = normalize(sql)
+            logger.warning('Slow query (%.1f ms) in %s: %s',
+                           milliseconds, view or '-', normalized)
+
+            entry, _ = SlowQuery.objects.get_or_create(
+                fingerprint=fingerprint(sql), view=view,
+                defaults={'sql': normalized},
+            )
+            now = timezone.now()
+            rows = SlowQuery.objects.filter(pk=entry.pk)
+            # the params are never stored, they can hold token keys or
+            # password hashes
+            rows.filter(max_ms__lt=milliseconds).update(example=sql)
+            rows.update(
+                calls=F('calls') + 1,
+                total_ms=F('total_ms') + milliseconds,
+                max_ms=Greatest(F('max_ms'), milliseconds),
+                last_seen=now,
+            )
+
+            if entry.explained_at is None or \
+                    now - entry.explained_at >= interval:
+                plan = explain(alias, sql, params)
+                if plan is not None:
+                    rows.update(explain=plan, explained_at=now)
+
+
+recorder = Recorder()
@@ -1,23 +1,67 @@
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
 
+def fake_connection(failures=0):
+    """Return a connection whose cursor() fails the first failures times,
+    and the cursor it returns then"""
+    connection, cursor = MagicMock(), MagicMock()
+    connection.cursor.side_effect = \
+        [OperationalError('refused')] * failures + [cursor]
+    return connection, cursor.__enter__.return_value
+
+
 class CommandTest(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
+        connection, cursor = fake_connection()
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
+            gi.return_value = connection
+            call_command('wait_for_db', stdout=StringIO())
             self.assertEqual(gi.call_count, 1)
+        cursor.execute.assert_called_once_with('SELECT 1')
 
     @patch('time.sleep', return_value=None)
     def test_wait_for_db(self, ts):
         """Test waiting for db"""
+        connection, _ = fake_connection(failures=5)
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            gi.return_value = connection
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(connection.cursor.call_count, 6)
+
+        delays = [call[0][0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            bound = min(5.0, 0.1 * 2 ** attempt)
+            self.assertTrue(bound / 2 <= delay <= bound)
+
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db_timeout(self, ts):
+        """Test giving up once the timeout runs out"""
+        connection = MagicMock()
+        connection.cursor.side_effect = OperationalError('refused')
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi, \
+                patch('time.monotonic', side_effect=range(0, 1000, 2)):
+            gi.return_value = connection
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=5, stdout=StringIO())
+            self.assertLess(connection.cursor.call_count, 5)
+
+    def test_wait_for_db_unknown_alias(self):
+        """Test an unknown database alias is an error"""
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', databases=['nope'], stdout=StringIO())
+
+    def test_wait_for_db_real_connection(self):
+        """Test the probe succeeds against the test database"""
+        out = StringIO()
+        call_command('wait_for_db', databases=['default'], stdout=out)
+
+        self.assertIn('Database default ready', out.getvalue())
@@ -0,0 +1,60 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import export
+from core.models import Recepi
+
+
+class ExportTests(TestCase):
+    """Test the streaming recepi export"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'export@gmail.com',
+            'te4s134'
+        )
+        for i in range(5):
+            Recepi.objects.create(
+                user=self.user, title='Recepi %d' % i, time_minutes=10,
+                price=5.00
+            )
+
+    def test_iter_recepis_chunks(self):
+        """Test recepis are prefetched chunk by chunk"""
+        queryset = Recepi.objects.order_by('id')
+        # one select, then tags and ingredients for each of the 3 chunks
+        with self.assertNumQueries(7):
+            recepis = list(export.iter_recepis(queryset, chunk_size=2))
+
+        self.assertEqual(len(recepis), 5)
+
+    def test_accepts_gzip(self):
+        """Test the q-values of Accept-Encoding are honored"""
+        for header, expected in (('gzip', True),
+                                 ('deflate, gzip;q=0.5', True),
+                                 ('*', True),
+                                 ('gzip;q=0', False),
+                                 ('*, gzip;q=0', False),
+                                 ('*;q=0', False),
+                                 ('br', False),
+                                 ('', False)):
+            self.assertEqual(export.accepts_gzip(header), expected, header)
+
+    def test_export_command(self):
+        """Test the export command writes one line per recepi"""
+        out = StringIO()
+        call_command('export_recepis', 'export@gmail.com', stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], 'Recepi 0')
+
+    def test_export_command_unknown_user(self):
+        """Test exporting an unknown user fails"""
+        with self.assertRaises(CommandError):
+            call_command('export_recepis', 'nobody@gmail.com')
@@ -0,0 +1,184 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from core import bulk, importer
+from core.management.commands import import_recepis
+from recepi import search
+from core.models import Recepi, Tag, Ingredient
+
+
+class ImportTests(TestCase):
+    """Test the bulk recepi import"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'import@gmail.com',
+            'te4s134'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'te4s134'
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as out:
+            out.write(content)
+        return path
+
+    def write_jsonl(self, rows):
+        return self.write('rows.jsonl', ''.join(
+            json.dumps(row) + '\n' for row in rows
+        ))
+
+    def recepi_row(self, title, user='import@gmail.com', **params):
+        row = {'user': user, 'title': title, 'time_minutes': 10,
+               'price': '5.00', 'tags': [], 'ingredients': []}
+        row.update(params)
+        return row
+
+    def test_import_jsonl(self):
+        """Test importing recepis resolves and creates tags/ingredients"""
+        path = self.write_jsonl([
+            self.recepi_row('Curry', tags=['Vegan', 'Spicy'],
+                            ingredients=['Salt']),
+            self.recepi_row('Cake', tags=['Spicy']),
+            self.recepi_row('Other', user='other@gmail.com', tags=['Vegan']),
+        ])
+
+        call_command('import_recepis', path, stdout=StringIO())
+
+        curry = Recepi.objects.get(title='Curry')
+        self.assertEqual(curry.user, self.user)
+        self.assertIn(self.vegan, curry.tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            [i.name for i in curry.ingredients.all()], ['Salt']
+        )
+        other = Recepi.objects.get(title='Other')
+        self.assertNotIn(self.vegan, other.tags.all())
+        self.assertEqual(other.tags.get().user, self.other)
+        found = search.search(Recepi.objects.all(), 'spicy')
+        self.assertEqual(sorted(r.title for r in found), ['Cake', 'Curry'])
+
+    def test_import_csv_default_user(self):
+        """Test importing a CSV export into a user"""
+        path = self.write('rows.csv', (
+            'id,title,time_minutes,price,link,tags,ingredients\n'
+            '1,Curry,20,7.50,,Vegan|Spicy,Salt|Rice\n'
+        ))
+
+        call_command('import_recepis', path, '--user', 'import@gmail.com',
+                     stdout=StringIO())
+
+        curry = Recepi.objects.get(title='Curry', user=self.user)
+        self.assertEqual(curry.time_minutes, 20)
+        self.assertEqual(str(curry.price), '7.50')
+        self.assertEqual(curry.tags.count(), 2)
+        self.assertEqual(Ingredient.objects.count(), 2)
+
+    def test_invalid_rows_skipped(self):
+        """Test invalid rows are reported and the others imported"""
+        path = self.write_jsonl([
+            self.recepi_row('Curry'),
+            self.recepi_row('Unknown', user='nobody@gmail.com'),
+            self.recepi_row('Bad', time_minutes='soon'),
+        ])
+
+        stats = importer.run(path)
+
+        self.assertEqual(stats['rows'], 1)
+        self.assertEqual(stats['errors'], 2)
+        self.assertEqual(Recepi.objects.get().title, 'Curry')
+
+    def test_resume_from_checkpoint(self):
+        """Test rerunning with a checkpoint skips committed rows"""
+        path = self.write_jsonl([self.recepi_row('r%d' % i)
+                                 for i in range(5)])
+        checkpoint = os.path.join(self.tmpdir.name, 'import')
+
+        importer.run(path, batch_size=2, checkpoint=checkpoint)
+        stats = importer.run(path, batch_size=2, checkpoint=checkpoint)
+
+        self.assertEqual(stats['rows'], 0)
+        self.assertEqual(Recepi.objects.count(), 5)
+
+    def test_failed_batch_resumes_without_duplicates(self):
+        """Test a batch failing after its rows are inserted is imported
+        again in full, and only once"""
+        path = self.write_jsonl([self.recepi_row('r%d' % i)
+                                 for i in range(5)])
+        reindex = search.reindex
+        calls = []
+
+        def fail_second_batch(ids):
+            calls.append(ids)
+            if len(calls) == 2:
+                raise RuntimeError('worker killed')
+            reindex(ids)
+
+        with patch.object(search, 'reindex', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                importer.run(path, batch_size=2, checkpoint='import',
+                             after_batch=import_recepis.index_batch)
+        self.assertEqual(Recepi.objects.count(), 2)
+
+        stats = importer.run(path, batch_size=2, checkpoint='import',
+                             after_batch=import_recepis.index_batch)
+
+        self.assertEqual(stats['rows'], 3)
+        self.assertEqual(
+            sorted(Recepi.objects.values_list('title', flat=True)),
+            ['r%d' % i for i in range(5)]
+        )
+
+    def test_worker_logs_to_stdout(self):
+        """Test a pool worker reports its progress on stdout"""
+        path = self.write_jsonl([self.recepi_row('Curry')])
+
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            import_recepis._run_worker({'path': path})
+
+        self.assertIn('worker 0: 1 rows', stdout.getvalue())
+
+    def test_workers_split_by_user(self):
+        """Test every row is imported by exactly one worker"""
+        path = self.write_jsonl([
+            self.recepi_row('r%d' % i, user=user)
+            for i in range(4)
+            for user in ('import@gmail.com', 'other@gmail.com')
+        ])
+
+        stats = [importer.run(path, worker=worker, workers=2)
+                 for worker in range(2)]
+
+        self.assertEqual(sum(s['rows'] for s in stats), 8)
+        self.assertEqual(Recepi.objects.count(), 8)
+
+    def test_copy_line_keeps_blank_strings(self):
+        """Test COPY input only reads NULL from None, not blank strings"""
+        line = bulk.copy_line(['Curry', '', None, 'say "hi"', '\\N', 5])
+
+        self.assertEqual(line, '"Curry","",,"say ""hi""","\\N","5"\n')
+
+    def test_param_batches_fit_the_backend(self):
+        """Test the batches leave room for the other params of a query"""
+        with patch.object(connection.features, 'max_query_params', 10):
+            batches = list(bulk.param_batches(range(25), 'default',
+                                              reserved=1))
+
+        self.assertEqual([len(batch) for batch in batches], [9, 9, 7])
+        self.assertEqual(sum(batches, []), list(range(25)))
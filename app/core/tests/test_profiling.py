@@ -0,0 +1,116 @@
+import marshal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.models import Recepi, RequestProfile
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+ME_URL = reverse('user:me')
+
+
+class ProfilingTests(TestCase):
+    """Test profiling API requests on demand"""
+
+    def setUp(self):
+        profiling.store.clear()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            'staff@gmail.com',
+            'te4s134',
+            is_staff=True
+        )
+        Recepi.objects.create(
+            user=self.staff, title='Stew', time_minutes=30, price=7
+        )
+        self.client.force_authenticate(self.staff)
+
+    def test_profile_staff_request(self):
+        """Test a staff request with ?_profile=1 is profiled"""
+        res = self.client.get(RECEPIS_URL, {'_profile': 1})
+
+        profile = profiling.store.get(int(res['X-Profile-Id']))
+        self.assertEqual(profile.path, RECEPIS_URL + '?_profile=1')
+        self.assertIn('recepi/mixins.py', profile.summary)
+        files = {filename for filename, _, _ in marshal.loads(profile.dump)}
+        self.assertTrue(any(name.endswith('core/renderers.py')
+                            for name in files))
+
+    def test_profile_header(self):
+        """Test the X-Profile header asks for a profile too"""
+        res = self.client.get(ME_URL, HTTP_X_PROFILE='1')
+
+        self.assertIn('X-Profile-Id', res)
+
+    def test_no_profile_without_flag(self):
+        """Test requests aren't profiled unless asked"""
+        res = self.client.get(RECEPIS_URL)
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(profiling.store.all(), [])
+
+    def test_no_profile_for_regular_users(self):
+        """Test only staff users can profile"""
+        user = get_user_model().objects.create_user(
+            'user@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(RECEPIS_URL, {'_profile': 1})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn('X-Profile-Id', res)
+
+    def test_ring_buffer(self):
+        """Test only the latest profiles are kept"""
+        ids = []
+        with patch.object(profiling.store, 'size', 2):
+            for _ in range(3):
+                ids.append(int(self.client.get(
+                    RECEPIS_URL, {'_profile': 1}
+                )['X-Profile-Id']))
+
+        self.assertEqual([profile.pk for profile in profiling.store.all()],
+                         [ids[2], ids[1]])
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+    def test_profiles_shared_by_workers(self):
+        """Test the profiles are stored in the database, not in the
+        process that ran the request"""
+        pk = int(self.client.get(
+            RECEPIS_URL, {'_profile': 1}
+        )['X-Profile-Id'])
+
+        other_worker = profiling.ProfileStore(50)
+        self.assertEqual(other_worker.get(pk).path,
+                         RECEPIS_URL + '?_profile=1')
+
+    def test_admin_views(self):
+        """Test staff can browse and download the profiles in the admin"""
+        pk = int(self.client.get(
+            RECEPIS_URL, {'_profile': 1}
+        )['X-Profile-Id'])
+        admin = Client()
+        admin.force_login(self.staff)
+
+        res = admin.get(reverse('profile-list'))
+        self.assertContains(res, RECEPIS_URL)
+        res = admin.get(reverse('profile-detail', args=[pk]))
+        self.assertContains(res, 'cumulative')
+        res = admin.get(reverse('profile-download', args=[pk]))
+        self.assertEqual(marshal.loads(res.content),
+                         marshal.loads(bytes(profiling.store.get(pk).dump)))
+        res = admin.get(reverse('profile-detail', args=[pk + 100]))
+        self.assertEqual(res.status_code, 404)
+
+    def test_admin_views_require_staff(self):
+        """Test the profiles are hidden from anonymous users"""
+        res = Client().get(reverse('profile-list'))
+
+        self.assertEqual(res.status_code, 302)
@@ -0,0 +1,76 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.translation import ugettext_lazy as _
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(TestCase):
+    """Test the orjson renderer matches DRF's JSON renderer"""
+
+    def assertRendersLikeDRF(self, data):
+        rendered = ORJSONRenderer().render(data)
+        self.assertIsInstance(rendered, bytes)
+        self.assertEqual(
+            json.loads(rendered), json.loads(JSONRenderer().render(data))
+        )
+        return rendered
+
+    def test_render_recepi(self):
+        """Test rendering a recepi list with decimals"""
+        self.assertRendersLikeDRF([{
+            'id': 1, 'title': 'Curry', 'tags': [1, 2], 'ingredients': [],
+            'time_minutes': 10, 'price': Decimal('5.50'), 'link': '',
+        }])
+
+    def test_render_datetimes(self):
+        """Test datetimes are rendered the way DRF does"""
+        rendered = self.assertRendersLikeDRF({
+            'at': datetime.datetime(
+                2020, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc
+            ),
+            'day': datetime.date(2020, 1, 2),
+        })
+
+        self.assertIn(b'"2020-01-02T03:04:05.678000Z"', rendered)
+
+    def test_render_lazy_strings(self):
+        """Test lazy translation strings are rendered as text"""
+        rendered = self.assertRendersLikeDRF({'detail': _('Not found.')})
+
+        self.assertEqual(rendered, b'{"detail":"Not found."}')
+
+    def test_render_none(self):
+        """Test no data renders an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_render_indent(self):
+        """Test the indent media type parameter pretty prints"""
+        rendered = ORJSONRenderer().render(
+            {'id': 1}, 'application/json; indent=4'
+        )
+
+        self.assertEqual(rendered, b'{\n  "id": 1\n}')
+
+
+class ORJSONParserTests(TestCase):
+    """Test the orjson parser"""
+
+    def test_parse(self):
+        """Test parsing a JSON body"""
+        data = ORJSONParser().parse(io.BytesIO(b'[{"name": "Vegan"}]'))
+
+        self.assertEqual(data, [{'name': 'Vegan'}])
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a parse error"""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"name": '))
@@ -0,0 +1,195 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, \
+    override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import routers
+from core.middleware import ReplicaMiddleware
+from core.models import Recepi
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+@override_settings(REPLICA_PATHS=('/api/recepi/',), REPLICA_PIN_SECONDS=5,
+                   REPLICA_MAX_LAG_SECONDS=5, REPLICA_LAG_CHECK_INTERVAL=60)
+@patch('core.routers.replicas', return_value=['replica1'])
+class ReplicaRoutingTests(TestCase):
+    """Test routing the reads of safe requests to the replicas"""
+
+    def setUp(self):
+        routers._lag.clear()
+        self.factory = RequestFactory()
+        self.used = []
+
+    def view(self, request):
+        self.used.append(router.db_for_read(Recepi))
+        if request.method == 'POST':
+            self.used.append(router.db_for_write(Recepi))
+            self.used.append(router.db_for_read(Recepi))
+        return HttpResponse()
+
+    def call(self, request, lag=0.0):
+        with patch('core.routers.replica_lag', return_value=lag) as check:
+            response = ReplicaMiddleware(self.view)(request)
+
+        return response, check
+
+    def test_get_reads_from_replica(self, replicas):
+        """Test a GET on the API reads from the replica"""
+        self.call(self.factory.get(RECEPIS_URL))
+
+        self.assertEqual(self.used, ['replica1'])
+        self.assertEqual(router.db_for_read(Recepi), 'default')
+
+    def test_other_paths_read_from_primary(self, replicas):
+        """Test requests outside REPLICA_PATHS read from the primary"""
+        self.call(self.factory.get('/admin/'))
+
+        self.assertEqual(self.used, ['default'])
+
+    def test_write_pins_to_primary(self, replicas):
+        """Test a write goes to the primary and pins the client"""
+        response, _ = self.call(self.factory.post(RECEPIS_URL))
+
+        self.assertEqual(self.used, ['default', 'default', 'default'])
+        pin = float(response[ReplicaMiddleware.header_name])
+        self.assertAlmostEqual(pin, time.time() + 5, delta=1)
+        self.assertEqual(
+            response.cookies[ReplicaMiddleware.cookie_name].value,
+            response[ReplicaMiddleware.header_name]
+        )
+
+    def test_pinned_by_cookie(self, replicas):
+        """Test a client within the pin window reads from the primary"""
+        request = self.factory.get(RECEPIS_URL)
+        request.COOKIES[ReplicaMiddleware.cookie_name] = str(time.time() + 5)
+        self.call(request)
+
+        self.assertEqual(self.used, ['default'])
+
+    def test_pinned_by_header(self, replicas):
+        """Test the pin header works for clients without cookies"""
+        self.call(self.factory.get(
+            RECEPIS_URL, HTTP_X_DB_PIN=str(time.time() + 5)
+        ))
+        self.call(self.factory.get(
+            RECEPIS_URL, HTTP_X_DB_PIN=str(time.time() - 1)
+        ))
+        self.call(self.factory.get(RECEPIS_URL, HTTP_X_DB_PIN='junk'))
+
+        self.assertEqual(self.used, ['default', 'replica1', 'replica1'])
+
+    def test_lagging_replica_falls_back(self, replicas):
+        """Test a replica too far behind is skipped"""
+        self.call(self.factory.get(RECEPIS_URL), lag=30.0)
+
+        self.assertEqual(self.used, ['default'])
+
+    def test_unreachable_replica_falls_back(self, replicas):
+        """Test a replica that can't be queried is skipped"""
+        self.call(self.factory.get(RECEPIS_URL), lag=float('inf'))
+
+        self.assertEqual(self.used, ['default'])
+
+    def test_lag_checked_once_per_interval(self, replicas):
+        """Test the lag is measured at most once per check interval"""
+        _, check = self.call(self.factory.get(RECEPIS_URL))
+        with patch('core.routers.replica_lag') as second:
+            ReplicaMiddleware(self.view)(self.factory.get(RECEPIS_URL))
+
+        self.assertEqual(check.call_count, 1)
+        second.assert_not_called()
+        self.assertEqual(self.used, ['replica1', 'replica1'])
+
+    def test_no_replicas(self, replicas):
+        """Test everything goes to the primary without replicas"""
+        replicas.return_value = []
+        self.call(self.factory.get(RECEPIS_URL))
+
+        self.assertEqual(self.used, ['default'])
+
+    def test_replica_lag_of_primary_backend(self, replicas):
+        """Test the lag query runs against a live connection"""
+        self.assertEqual(routers.replica_lag('default'), 0.0)
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA],
+                   REPLICA_PATHS=('/api/recepi/',),
+                   REPLICA_LAG_CHECK_INTERVAL=60)
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Test requests through a second, real database as replica"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.tmpdir.name, 'replica.sqlite3'),
+        }
+        with connections[REPLICA].schema_editor() as editor:
+            for model in apps.get_models():
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        routers._lag.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'replica@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        # written to the primary only, as if the replica lagged behind
+        Recepi.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5
+        )
+
+    def titles(self, response):
+        return [recepi['title'] for recepi in response.json()['results']]
+
+    def test_lagging_replica_not_cached(self):
+        """Test a list read from a replica is neither tagged nor cached
+        under the current data version"""
+        url = RECEPIS_URL
+
+        res = self.client.get(url)
+        self.assertEqual(self.titles(res), [])
+        self.assertFalse(res.has_header('ETag'))
+
+        res = self.client.get(url, HTTP_X_DB_PIN=str(time.time() + 60))
+        self.assertEqual(self.titles(res), ['Curry'])
+        self.assertTrue(res.has_header('ETag'))
+
+    def test_write_pins_reads_to_primary(self):
+        """Test the client reads its own write from the primary"""
+        url = RECEPIS_URL
+        res = self.client.post(url, {
+            'title': 'Stew', 'time_minutes': 20, 'price': '4.00',
+            'tags': [], 'ingredients': [],
+        }, format='json')
+        self.assertEqual(res.status_code, 201)
+
+        res = self.client.get(url)
+
+        self.assertEqual(self.titles(res), ['Stew', 'Curry'])
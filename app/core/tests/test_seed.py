@@ -0,0 +1,83 @@
+import random
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.test import TestCase
+
+from core import seed
+from core.models import Recepi, Tag, Ingredient
+
+
+class SeedTests(TestCase):
+    """Test seeding synthetic data"""
+
+    def seed(self, **options):
+        options.setdefault('users', 10)
+        options.setdefault('recepis_per_user', 20)
+        call_command('seed_data', stdout=StringIO(), **options)
+
+    def titles(self, email, users=10):
+        """Return the recepi titles of each seeded user"""
+        return [list(Recepi.objects.filter(
+            user__email=email % number
+        ).order_by('id').values_list('title', flat=True))
+            for number in range(users)]
+
+    def test_seed_data(self):
+        """Test the requested amount of rows is created"""
+        self.seed()
+
+        users = get_user_model().objects.filter(email__startswith='seed')
+        self.assertEqual(users.count(), 10)
+        self.assertEqual(Recepi.objects.count(), 200)
+        self.assertEqual(
+            Tag.objects.count(), 10 * seed.TAGS_PER_USER
+        )
+        self.assertEqual(
+            Ingredient.objects.count(), 10 * seed.INGREDIENTS_PER_USER
+        )
+        self.assertTrue(users[0].check_password('password'))
+        self.assertEqual(len({user.password for user in users}), 1)
+
+    def test_links_belong_to_the_owner(self):
+        """Test recepis only link the tags and ingredients of their user"""
+        self.seed()
+
+        for field in ('tags', 'ingredients'):
+            through = getattr(Recepi, field).through
+            links = through.objects.all()
+            self.assertGreater(links.count(), 0)
+            owner = field[:-1] + '__user_id'
+            self.assertFalse(
+                links.exclude(recepi__user_id=F(owner)).exists()
+            )
+        self.assertFalse(Recepi.objects.filter(ingredients=None).exists())
+
+    def test_deterministic(self):
+        """Test the same seed gives the same data whatever the batch size"""
+        self.seed(email='a%d@example.com', batch_size=7)
+        self.seed(email='b%d@example.com', batch_size=1000)
+        self.seed(email='c%d@example.com', seed=1)
+
+        first = self.titles('a%d@example.com')
+        self.assertEqual(sum(len(titles) for titles in first), 200)
+        self.assertEqual(first, self.titles('b%d@example.com'))
+        self.assertNotEqual(first, self.titles('c%d@example.com'))
+
+    def test_skewed_distribution(self):
+        """Test a few users own most of the recepis"""
+        counts = seed.distribute(100000, 1000, random.Random(0))
+
+        self.assertEqual(sum(counts), 100000)
+        counts.sort(reverse=True)
+        self.assertGreater(sum(counts[:100]), 100000 * 0.4)
+
+    def test_existing_users(self):
+        """Test seeding twice with the same emails fails"""
+        self.seed(users=1)
+
+        with self.assertRaises(CommandError):
+            self.seed(users=1)
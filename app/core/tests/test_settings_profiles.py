@@ -0,0 +1,109 @@
+import importlib
+import os
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from app.settings import admin, api, production
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+API_STACK = override_settings(
+    MIDDLEWARE=api.MIDDLEWARE,
+    ROOT_URLCONF=api.ROOT_URLCONF,
+    REST_FRAMEWORK=api.REST_FRAMEWORK,
+)
+
+
+class SettingsProfilesTests(TestCase):
+    """Test the production settings profiles"""
+
+    def test_api_profile_is_slim(self):
+        """Test the API profile skips the browser-only apps and middleware"""
+        for app in ('django.contrib.admin', 'django.contrib.sessions',
+                    'django.contrib.messages'):
+            self.assertIn(app, admin.INSTALLED_APPS)
+            self.assertNotIn(app, api.INSTALLED_APPS)
+        for middleware in ('SessionMiddleware', 'CsrfViewMiddleware',
+                           'MessageMiddleware', 'XFrameOptionsMiddleware'):
+            self.assertFalse([name for name in api.MIDDLEWARE
+                              if name.endswith(middleware)])
+
+    def test_production_profiles(self):
+        """Test the production profiles keep database connections open
+        and only time a sample of the requests"""
+        for profile in (api, admin):
+            self.assertFalse(profile.DEBUG)
+            for database in profile.DATABASES.values():
+                self.assertGreater(database['CONN_MAX_AGE'], 0)
+            self.assertLess(profile.REQUEST_TIMING_SAMPLE_RATE, 1)
+
+    def test_production_caches(self):
+        """Test the production profiles only turn on ETags with a shared
+        cache"""
+        self.assertIn('LocMemCache', admin.CACHES['default']['BACKEND'])
+        self.assertFalse(admin.RECEPI_CONDITIONAL_ENABLED)
+        self.assertEqual(admin.TOKEN_AUTH_CACHE_SIZE, 0)
+
+        try:
+            with patch.dict(os.environ,
+                            DJANGO_CACHE_LOCATION='cache:11211'):
+                importlib.reload(production)
+            cache = production.CACHES['default']
+            self.assertIn('Memcached', cache['BACKEND'])
+            self.assertEqual(cache['LOCATION'], ['cache:11211'])
+            self.assertEqual(production.TOKEN_AUTH_CACHE_ALIAS, 'default')
+            self.assertGreater(production.TOKEN_AUTH_CACHE_SIZE, 0)
+            self.assertTrue(production.RECEPI_CONDITIONAL_ENABLED)
+        finally:
+            importlib.reload(production)
+
+    @API_STACK
+    def test_api_profile_serves_token_requests(self):
+        """Test token authenticated requests work on the API stack"""
+        get_user_model().objects.create_user('api@gmail.com', 'te4s134')
+        client = APIClient()
+
+        res = client.post(
+            TOKEN_URL, {'email': 'api@gmail.com', 'password': 'te4s134'}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        client.credentials(HTTP_AUTHORIZATION='Token ' + res.data['token'])
+        res = client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], 'api@gmail.com')
+
+    def test_api_profiles_listed_by_admin(self):
+        """Test the profiles taken by the API workers are listed by the
+        admin workers"""
+        staff = get_user_model().objects.create_user(
+            'staff@gmail.com', 'te4s134', is_staff=True
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=staff).key
+        )
+        with API_STACK:
+            res = client.get(RECEPIS_URL, {'_profile': 1})
+        admin = Client()
+        admin.force_login(staff)
+
+        res = admin.get(reverse('profile-detail', args=[res['X-Profile-Id']]))
+
+        self.assertContains(res, RECEPIS_URL + '?_profile=1')
+
+    @API_STACK
+    def test_api_profile_has_no_admin(self):
+        """Test the API workers don't route /admin/"""
+        res = APIClient().get('/admin/')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,105 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import slowqueries
+from core.models import Recepi, SlowQuery
+from user.authentication import token_cache
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_ASYNC=False)
+class SlowQueryTests(TestCase):
+    """Test the capture of slow queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'slow@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        Recepi.objects.create(
+            user=self.user, title='Stew', time_minutes=30, price=7
+        )
+
+    def test_queries_aggregated_by_fingerprint_and_view(self):
+        """Test repeated queries add up in one row per view"""
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            # distinct query strings, or the response cache serves the second
+            self.client.get(RECEPIS_URL, {'v': 1})
+            self.client.get(RECEPIS_URL, {'v': 2})
+
+        row = SlowQuery.objects.get(
+            view='recepi.views.RecepiViewSet',
+            sql__startswith='SELECT "core_recepi"."id"',
+        )
+        self.assertEqual(row.calls, 2)
+        self.assertGreaterEqual(row.total_ms, row.max_ms)
+        self.assertIn('"core_recepi"."user_id" = %s', row.example)
+        self.assertIn(row.sql, '\n'.join(logs.output))
+
+    def test_params_not_stored(self):
+        """Test the parameters of slow queries are never stored"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        token_cache.clear()
+
+        with self.assertLogs('core.slowqueries', 'WARNING') as logs:
+            client.get(reverse('user:me'))
+
+        self.assertTrue(SlowQuery.objects.filter(
+            sql__contains='authtoken_token'
+        ).exists())
+        for row in SlowQuery.objects.all():
+            self.assertNotIn(token.key, row.sql + row.example)
+        self.assertNotIn(token.key, '\n'.join(logs.output))
+
+    def test_no_explain_outside_postgres(self):
+        """Test EXPLAIN is only collected on Postgres"""
+        with patch.object(slowqueries.connections['default'], 'vendor',
+                          'sqlite'):
+            with self.assertLogs('core.slowqueries', 'WARNING'):
+                self.client.get(RECEPIS_URL)
+
+        self.assertFalse(SlowQuery.objects.exclude(explain='').exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_threshold_none_disables_capture(self):
+        """Test no query is recorded when the threshold is None"""
+        self.client.get(RECEPIS_URL)
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_redact_plan(self):
+        """Test the string params are removed from EXPLAIN output"""
+        plan = "Index Scan\n  Index Cond: ((key)::text = 'abc123'::text)"
+
+        self.assertEqual(
+            slowqueries.redact(plan, ['abc123', 5, None]),
+            "Index Scan\n  Index Cond: ((key)::text = '?'::text)"
+        )
+
+    def test_fingerprint_ignores_values(self):
+        """Test queries differing only by values share a fingerprint"""
+        first = slowqueries.fingerprint(
+            "SELECT * FROM core_recepi WHERE user_id = 1 AND title = 'a' "
+            "AND id IN (1, 2, 3)"
+        )
+        second = slowqueries.fingerprint(
+            'SELECT *  FROM core_recepi\nWHERE user_id = %s AND title = %s '
+            'AND id IN (%s, %s)'
+        )
+        other = slowqueries.fingerprint(
+            'SELECT * FROM core_tag WHERE user_id = %s'
+        )
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
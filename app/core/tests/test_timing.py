@@ -0,0 +1,122 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Recepi
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+METRICS_URL = reverse('metrics')
+
+
+def server_timing(response):
+    """Return {name: (duration, desc)} from the Server-Timing header"""
+    timings = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        timings[name] = (float(params['dur']), params.get('desc'))
+
+    return timings
+
+
+class TimingMiddlewareTests(TestCase):
+    """Test the per-request timing of the API views"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'timing@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        Recepi.objects.create(
+            user=self.user, title='Stew', time_minutes=30, price=7
+        )
+
+    def test_server_timing_header(self):
+        """Test API responses report their phases"""
+        res = self.client.get(RECEPIS_URL)
+
+        timings = server_timing(res)
+        self.assertEqual(
+            set(timings), {'db', 'serialize', 'render', 'total'}
+        )
+        queries = int(re.match(r'"(\d+) queries"', timings['db'][1]).group(1))
+        self.assertGreater(queries, 0)
+        self.assertGreaterEqual(timings['total'][0], timings['render'][0])
+
+    def test_server_timing_restricted(self):
+        """Test only staff users and the allowed addresses see the
+        Server-Timing header"""
+        res = self.client.get(RECEPIS_URL, REMOTE_ADDR='203.0.113.5')
+        self.assertNotIn('Server-Timing', res)
+
+        self.user.is_staff = True
+        res = self.client.get(RECEPIS_URL, REMOTE_ADDR='203.0.113.5')
+        self.assertIn('Server-Timing', res)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_sampling_disabled(self):
+        """Test unsampled requests are not timed"""
+        res = self.client.get(RECEPIS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_other_views_not_timed(self):
+        """Test views outside the API modules get no header"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_metrics_endpoint(self):
+        """Test the histograms are exposed in the Prometheus format"""
+        self.client.get(RECEPIS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        label = 'view="recepi.views.RecepiViewSet",method="GET"'
+        match = re.search(
+            r'http_request_duration_seconds_count\{%s\} (\S+)' % label, body
+        )
+        self.assertGreaterEqual(float(match.group(1)), 1)
+        self.assertIn('recepi_conditional_misses_total ', body)
+
+    def test_metrics_restricted_to_allowed_ips(self):
+        """Test only the allowed addresses can scrape the metrics"""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(res.status_code, 403)
+
+        with override_settings(METRICS_ALLOWED_IPS=('203.0.113.0/24',)):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(res.status_code, 200)
+
+
+class HistogramTests(TestCase):
+    """Test the in-process histograms"""
+
+    def test_buckets_are_cumulative(self):
+        """Test observations land in cumulative buckets"""
+        histogram = metrics.Histogram(
+            'test_seconds', 'Test', ('view',), buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value, 'a')
+
+        samples = [(suffix, dict(labels), value)
+                   for suffix, labels, value in histogram.samples()]
+
+        self.assertEqual(samples, [
+            ('_bucket', {'view': 'a', 'le': '0.1'}, 1),
+            ('_bucket', {'view': 'a', 'le': '1.0'}, 3),
+            ('_bucket', {'view': 'a', 'le': '+Inf'}, 4),
+            ('_sum', {'view': 'a'}, 4.25),
+            ('_count', {'view': 'a'}, 4),
+        ])
@@ -0,0 +1,98 @@
+"""Where the time of a request goes.
+
+`core.middleware.TimingMiddleware` starts a `RequestTiming` for the
+sampled requests, and the code doing the work reports its phases with
+`span()`. Outside a sampled request `span()` only looks up a thread
+local, so the instrumentation costs next to nothing.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from rest_framework import serializers
+
+_state = threading.local()
+
+
+class RequestTiming:
+    """Seconds spent per phase of one request, and its database queries"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', time.perf_counter() - start)
+
+    def server_timing(self):
+        """Return the Server-Timing header value, durations in ms"""
+        metrics = ['%s;dur=%.2f' % (name, seconds * 1000)
+                   for name, seconds in sorted(self.spans.items())
+                   if name != 'db']
+        metrics.insert(0, 'db;dur=%.2f;desc="%d queries"' % (
+            self.spans.get('db', 0.0) * 1000, self.queries
+        ))
+
+        return ', '.join(metrics)
+
+
+def current():
+    """Return the timing of the request being handled, if it's sampled"""
+    return getattr(_state, 'timing', None)
+
+
+@contextmanager
+def timed_request():
+    """Start timing the request handled by the block"""
+    previous = current()
+    _state.timing = timing = RequestTiming()
+    try:
+        yield timing
+    finally:
+        _state.timing = previous
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the name phase of the request"""
+    timing = current()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer reporting its `data` as the serialize phase"""
+
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Report `data` as the serialize phase.
+
+    Set `list_serializer_class = TimedListSerializer` in the Meta as well,
+    as lists don't go through the `data` of their child.
+    """
+
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
@@ -0,0 +1,65 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import render
+
+from core import metrics, profiling
+
+
+def metrics_allowed(request):
+    """Return whether the client address is in METRICS_ALLOWED_IPS"""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    )
+
+
+def metrics_view(request):
+    """Serve the in-process metrics in the Prometheus text format, to the
+    scrapers of METRICS_ALLOWED_IPS only"""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.exposition(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def _get_profile(pk):
+    profile = profiling.store.get(pk)
+    if profile is None:
+        raise Http404('No profile %d' % pk)
+    return profile
+
+
+def profile_list(request):
+    """List the kept profiles"""
+    return render(request, 'admin/core/profile_list.html', {
+        'title': 'Request profiles',
+        'profiles': profiling.store.all(),
+    })
+
+
+def profile_detail(request, pk):
+    """Show the top-N summary of a profile"""
+    profile = _get_profile(pk)
+    return render(request, 'admin/core/profile_detail.html', {
+        'title': 'Profile %d' % profile.pk,
+        'profile': profile,
+    })
+
+
+def profile_download(request, pk):
+    """Download a profile as a pstats file"""
+    response = HttpResponse(
+        bytes(_get_profile(pk).dump), content_type='application/octet-stream'
+    )
+    response['Content-Disposition'] = \
+        'attachment; filename="profile-%d.prof"' % pk
+
+    return response
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RecepiConfig(AppConfig):
     name = 'recepi'
+
+    def ready(self):
+        from recepi import signals  # noqa
@@ -0,0 +1,291 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+
+from rest_framework import serializers, status
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core import bulk, metrics, routers, timing
+
+from recepi import versions
+
+CONDITIONAL_HITS = metrics.counter(
+    'recepi_conditional_hits_total',
+    'Conditional GETs answered with 304'
+)
+CONDITIONAL_MISSES = metrics.counter(
+    'recepi_conditional_misses_total',
+    'Conditional GETs answered with a full response'
+)
+CONDITIONAL_SERIALIZE_SECONDS = metrics.counter(
+    'recepi_conditional_serialize_seconds_total',
+    'Time spent building the full responses'
+)
+CONDITIONAL_SAVED_SECONDS = metrics.counter(
+    'recepi_conditional_saved_seconds_total',
+    'Estimated time saved by the 304 responses'
+)
+RESPONSE_CACHE_HITS = metrics.counter(
+    'recepi_response_cache_hits_total',
+    'List responses served from the response cache'
+)
+
+
+class BulkCreateModelMixin:
+    """Create a list of objects in one request.
+
+    A list payload is validated as a whole, errors are reported per item
+    in payload order, and the rows plus their many-to-many links are
+    inserted with bulk_create in one transaction. A single object payload
+    goes through the regular create.
+    """
+    bulk_create_max_items = 10000
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        if len(request.data) > self.bulk_create_max_items:
+            raise ValidationError(
+                'Expected at most %d items' % self.bulk_create_max_items
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            objs = self.perform_bulk_create(serializer)
+        serializer = self.get_serializer(objs, many=True)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        """Insert the validated items and their many-to-many links"""
+        model = serializer.child.Meta.model
+        m2m_fields = model._meta.many_to_many
+        objs, links = [], []
+        for data in serializer.validated_data:
+            data = dict(data)
+            links.append({
+                field.name: data.pop(field.name, []) for field in m2m_fields
+            })
+            objs.append(model(user=self.request.user, **data))
+        objs = bulk.bulk_create(model, objs)
+
+        for field in m2m_fields:
+            through = field.remote_field.through
+            source = field.m2m_field_name() + '_id'
+            target = field.m2m_reverse_field_name() + '_id'
+            rows = []
+            for obj, related in zip(objs, links):
+                pks = dict.fromkeys(item.pk for item in related[field.name])
+                rows += [through(**{source: obj.pk, target: pk}) for pk in pks]
+            bulk.bulk_create(through, rows, fetch_pks=False)
+        prefetch_related_objects(objs, *[field.name for field in m2m_fields])
+        # bulk_create sends no signals
+        versions.bump(self.request.user.pk)
+
+        return objs
+
+
+class ConditionalListMixin:
+    """Answer list requests from what the user's data version allows.
+
+    The weak ETag is derived from the per-user data version, the full path
+    and the Accept header, so a matching If-None-Match is answered with 304
+    before any query or serializer runs. Otherwise the list is served from
+    the rendered bytes cached under the same ETag when available. Lists
+    read from a replica get neither an ETag nor a cache entry. Both are
+    off when RECEPI_CONDITIONAL_ENABLED is False.
+    """
+
+    def get_etag(self, request):
+        """Return the weak ETag of the response to request"""
+        key = '%s|%s|%s' % (
+            versions.get(request.user.pk),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        )
+
+        return 'W/"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def get_response_cache(self):
+        """Return the cache holding the rendered list responses"""
+        return caches[getattr(settings, 'RECEPI_RESPONSE_CACHE', 'default')]
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 if the client has the current ETag, the cached
+        response if there is one, else run handler"""
+        if not getattr(settings, 'RECEPI_CONDITIONAL_ENABLED', True):
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(request)
+        client_etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag[2:] in [client_etag.replace('W/', '', 1)
+                        for client_etag in client_etags]:
+            CONDITIONAL_HITS.inc()
+            if CONDITIONAL_MISSES.value:
+                CONDITIONAL_SAVED_SECONDS.inc(
+                    CONDITIONAL_SERIALIZE_SECONDS.value /
+                    CONDITIONAL_MISSES.value
+                )
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+
+        # a replica may lag behind the version, what it returns must not
+        # be cached or tagged with it
+        from_replica = routers.read_alias() is not None
+        if self.action == 'list':
+            key = 'recepi:response:%s:%s' % (request.user.pk, etag[3:-1])
+            cached = self.get_response_cache().get(key)
+            if cached is not None:
+                RESPONSE_CACHE_HITS.inc()
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['ETag'] = etag
+                return response
+            if not from_replica:
+                self.response_cache_key = key
+
+        start = time.perf_counter()
+        response = handler(request, *args, **kwargs)
+        CONDITIONAL_SERIALIZE_SECONDS.inc(time.perf_counter() - start)
+        CONDITIONAL_MISSES.inc()
+        if response.status_code == status.HTTP_200_OK and not from_replica:
+            response['ETag'] = etag
+
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(self, 'response_cache_key', None)
+        if key is not None and isinstance(response, Response) and \
+                response.status_code == status.HTTP_200_OK:
+            response.render()
+            self.get_response_cache().set(
+                key,
+                (response.content, response['Content-Type']),
+                getattr(settings, 'RECEPI_RESPONSE_CACHE_TIMEOUT', 300),
+            )
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ValuesListMixin:
+    """Build read-only list responses straight from values() rows.
+
+    The JSON is the same the list serializer produces, but no model is
+    instantiated and no field machinery runs per row: model fields are
+    read with values() and the pks of many-to-many fields with one query
+    per relation, grouped in memory. Serializers with any other kind of
+    field go through the regular list. Views opt in with
+    `values_list_enabled = True`.
+    """
+    values_list_enabled = False
+    # fields whose to_representation is the identity on database values
+    plain_fields = (serializers.CharField, serializers.IntegerField)
+
+    def use_values_list(self):
+        """Return whether the list may be built from values() rows"""
+        return self.values_list_enabled
+
+    def get_values_plan(self, serializer):
+        """Return (name, source, kind, to_representation) per output field,
+        or None if some field can't be read from values()"""
+        model = serializer.Meta.model
+        columns = {field.name for field in model._meta.concrete_fields}
+        m2m = {field.name for field in model._meta.many_to_many}
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, ManyRelatedField) and \
+                    isinstance(field.child_relation, PrimaryKeyRelatedField) \
+                    and field.source in m2m:
+                plan.append((name, field.source, 'm2m', None))
+            elif field.source in columns:
+                convert = None if isinstance(field, self.plain_fields) \
+                    else field.to_representation
+                plan.append((name, field.source, 'column', convert))
+            else:
+                return None
+
+        return plan
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        plan = self.get_values_plan(serializer) \
+            if self.use_values_list() else None
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = [source for _, source, kind, _ in plan if kind == 'column']
+        # the paginator seeks on the ordering values of the rows
+        ordering = getattr(self.paginator, 'get_ordering', lambda view: ())
+        for name in ['id'] + [field.lstrip('-') for field in ordering(self)]:
+            if name not in columns:
+                columns.append(name)
+        rows = queryset.prefetch_related(None).values(*columns)
+
+        page = self.paginate_queryset(rows)
+        data = self.rows_to_data(
+            serializer.Meta.model, plan, list(rows) if page is None else page
+        )
+        if page is None:
+            return Response(data)
+
+        return self.get_paginated_response(data)
+
+    def rows_to_data(self, model, plan, rows):
+        """Return the serialized representation of values() rows"""
+        with timing.span('serialize'):
+            return self._rows_to_data(model, plan, rows)
+
+    def _rows_to_data(self, model, plan, rows):
+        related = {}
+        ids = [row['id'] for row in rows]
+        for _, source, kind, _ in plan:
+            if kind == 'm2m' and ids:
+                related[source] = self.related_pks(model, source, ids)
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, kind, convert in plan:
+                if kind == 'm2m':
+                    item[name] = related[source].get(row['id'], [])
+                elif convert is None or row[source] is None:
+                    item[name] = row[source]
+                else:
+                    item[name] = convert(row[source])
+            data.append(item)
+
+        return data
+
+    def related_pks(self, model, source, ids):
+        """Return {pk: [related pks]} for a many-to-many field in one query"""
+        descriptor = getattr(model, source)
+        own = descriptor.field.m2m_field_name() + '_id'
+        other = descriptor.field.m2m_reverse_field_name() + '_id'
+        related = {}
+        for pk, related_pk in descriptor.through.objects.filter(**{
+            own + '__in': ids
+        }).order_by(other).values_list(own, other):
+            related.setdefault(pk, []).append(related_pk)
+
+        return related
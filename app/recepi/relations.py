@@ -0,0 +1,121 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS, \
+    ManyRelatedField, PrimaryKeyRelatedField
+
+from core import bulk
+from core.timing import TimedListSerializer
+
+
+class UserPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Primary key relation limited to the objects of the request user.
+
+    With `many=True` the whole list of pks is validated with a single
+    `IN` query instead of one query per pk.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return UserManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset
+        return queryset.filter(user=request.user)
+
+    def to_pk(self, data):
+        """Return data converted to a pk value, or fail with incorrect_type"""
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class UserManyRelatedField(ManyRelatedField):
+    """Validate a list of pks with one query, keeping the payload order.
+
+    A list serializer can `preload()` the pks of all its items first, the
+    items are then validated without any query.
+    """
+    preloaded = None
+
+    def preload(self, pks):
+        """Load the objects of pks for the following validations"""
+        queryset = self.child_relation.get_queryset()
+        self.preloaded = {}
+        # user_id = %s takes one param next to the pks
+        for batch in bulk.param_batches(sorted(set(pks)), queryset.db,
+                                        reserved=1):
+            self.preloaded.update(
+                (obj.pk, obj) for obj in queryset.filter(pk__in=batch)
+            )
+
+    def get_objects(self, pks):
+        """Return {pk: object} for the pks that exist"""
+        if self.preloaded is not None:
+            return self.preloaded
+        return {obj.pk: obj for obj in
+                self.child_relation.get_queryset().filter(pk__in=set(pks))}
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = [child.to_pk(item) for item in data]
+        if not pks:
+            return []
+        objs = self.get_objects(pks)
+        for pk in pks:
+            if pk not in objs:
+                child.fail('does_not_exist', pk_value=pk)
+
+        return [objs[pk] for pk in pks]
+
+
+class PreloadingListSerializer(TimedListSerializer):
+    """Validate the relations of all the items with one query per field"""
+
+    def to_internal_value(self, data):
+        fields = [field for field in self.child.fields.values()
+                  if isinstance(field, UserManyRelatedField) and
+                  not field.read_only]
+        if not isinstance(data, list) or not fields:
+            return super().to_internal_value(data)
+
+        for field in fields:
+            field.preload(self._pks(field, data))
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in fields:
+                field.preloaded = None
+
+    @staticmethod
+    def _pks(field, data):
+        """Return the valid pks of field in the items, the invalid ones
+        are reported when the items are validated"""
+        pks = []
+        for item in data:
+            values = item.get(field.field_name) \
+                if isinstance(item, dict) else None
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                try:
+                    pks.append(field.child_relation.to_pk(value))
+                except ValidationError:
+                    continue
+
+        return pks
@@ -0,0 +1,129 @@
+"""Full-text search over recepi titles, tag names and ingredient names.
+
+On Postgres the document lives in the `core_recepi.search_vector` tsvector
+column (GIN indexed), on SQLite in the `core_recepi_search` FTS5 table.
+Neither is part of the django model; both are created by the
+`core.0007_recepi_search` migration and kept up to date by
+`recepi.signals`.
+"""
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from core import bulk
+
+SEARCH_CONFIG = 'english'
+
+# Weight of the title, tag and ingredient names in the ranking
+TITLE_WEIGHT, TAGS_WEIGHT, INGREDIENTS_WEIGHT = 10.0, 4.0, 1.0
+
+TAG_NAMES = (
+    "(SELECT {agg}(t.name, ' ') FROM core_tag t "
+    "INNER JOIN core_recepi_tags rt ON rt.tag_id = t.id "
+    "WHERE rt.recepi_id = r.id)"
+)
+INGREDIENT_NAMES = (
+    "(SELECT {agg}(i.name, ' ') FROM core_ingredient i "
+    "INNER JOIN core_recepi_ingredients ri ON ri.ingredient_id = i.id "
+    "WHERE ri.recepi_id = r.id)"
+)
+
+POSTGRES_REINDEX = (
+    "UPDATE core_recepi r SET search_vector = "
+    "setweight(to_tsvector('{config}', r.title), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce({tags}, '')), 'B') || "
+    "setweight(to_tsvector('{config}', coalesce({ingredients}, '')), 'C') "
+    "WHERE r.id IN ({ids})"
+)
+SQLITE_DELETE = "DELETE FROM core_recepi_search WHERE rowid IN ({ids})"
+SQLITE_REINDEX = (
+    "INSERT INTO core_recepi_search (rowid, title, tags, ingredients) "
+    "SELECT r.id, r.title, coalesce({tags}, ''), coalesce({ingredients}, '') "
+    "FROM core_recepi r WHERE r.id IN ({ids})"
+)
+
+
+def _batches(ids):
+    return bulk.param_batches(sorted(set(ids)), connection.alias)
+
+
+def reindex(recepi_ids):
+    """Rebuild the search document of the given recepis"""
+    vendor = connection.vendor
+    if vendor not in ('postgresql', 'sqlite'):
+        return
+
+    with connection.cursor() as cursor:
+        for batch in _batches(recepi_ids):
+            ids = ', '.join(['%s'] * len(batch))
+            if vendor == 'postgresql':
+                cursor.execute(POSTGRES_REINDEX.format(
+                    config=SEARCH_CONFIG,
+                    tags=TAG_NAMES.format(agg='string_agg'),
+                    ingredients=INGREDIENT_NAMES.format(agg='string_agg'),
+                    ids=ids,
+                ), batch)
+            else:
+                cursor.execute(SQLITE_DELETE.format(ids=ids), batch)
+                cursor.execute(SQLITE_REINDEX.format(
+                    tags=TAG_NAMES.format(agg='group_concat'),
+                    ingredients=INGREDIENT_NAMES.format(agg='group_concat'),
+                    ids=ids,
+                ), batch)
+
+
+def unindex(recepi_ids):
+    """Drop the search document of deleted recepis"""
+    if connection.vendor != 'sqlite':
+        # the tsvector column goes away with the row
+        return
+
+    with connection.cursor() as cursor:
+        for batch in _batches(recepi_ids):
+            ids = ', '.join(['%s'] * len(batch))
+            cursor.execute(SQLITE_DELETE.format(ids=ids), batch)
+
+
+def _fts5_query(terms):
+    """Quote every term so user input is never parsed as FTS5 syntax"""
+    return ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+def search(queryset, text):
+    """Filter queryset to the recepis matching text, annotated with rank"""
+    terms = text.split()
+    if not terms:
+        return queryset.annotate(
+            rank=RawSQL('0', [], output_field=FloatField())
+        )
+
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        tsquery = "plainto_tsquery('%s', %%s)" % SEARCH_CONFIG
+        return queryset.annotate(rank=RawSQL(
+            'ts_rank(core_recepi.search_vector, %s, 1)' % tsquery,
+            [text],
+            output_field=FloatField(),
+        )).extra(
+            where=['core_recepi.search_vector @@ %s' % tsquery],
+            params=[text],
+        )
+    if vendor == 'sqlite':
+        match = _fts5_query(terms)
+        return queryset.annotate(rank=RawSQL(
+            'SELECT -bm25(core_recepi_search, %s, %s, %s) '
+            'FROM core_recepi_search '
+            'WHERE core_recepi_search MATCH %s '
+            'AND core_recepi_search.rowid = core_recepi.id',
+            [TITLE_WEIGHT, TAGS_WEIGHT, INGREDIENTS_WEIGHT, match],
+            output_field=FloatField(),
+        )).extra(
+            where=['core_recepi.id IN (SELECT rowid FROM core_recepi_search '
+                   'WHERE core_recepi_search MATCH %s)'],
+            params=[match],
+        )
+
+    # no search index on other backends, match the title only
+    for term in terms:
+        queryset = queryset.filter(title__icontains=term)
+    return queryset.annotate(rank=RawSQL('0', [], output_field=FloatField()))
@@ -1,39 +1,83 @@
+from django.db import transaction
+
 from rest_framework import serializers
+from core import bulk
+from core.timing import TimedListSerializer, TimedSerializerMixin
 from core.models import Tag, Ingredient, Recepi
 
+from recepi.relations import PreloadingListSerializer, \
+    UserPrimaryKeyRelatedField
+
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialzier for tag objects"""
 
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = TimedListSerializer
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     """Serializer for ingredient object!"""
 
     class Meta:
         model = Ingredient
         fields = ('id','name')
         read_only_fields = ('id',)
+        list_serializer_class = TimedListSerializer
+
+
+class DynamicFieldsMixin:
+    """Narrow a serializer to `fields` and nest the `expand` relations"""
+    expandable = {}
 
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
 
-class RecepiSerializer(serializers.ModelSerializer):
+        for name in expand:
+            self.fields[name] = self.expandable[name](
+                many=True, read_only=True
+            )
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecepiSerializer(TimedSerializerMixin, DynamicFieldsMixin,
+                       serializers.ModelSerializer):
     """Serializer a recepi"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
+    expandable = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+
     class Meta:
         model = Recepi
         fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes',
                   'price', 'link')
         read_only_fields = ('id',)
+        list_serializer_class = PreloadingListSerializer
+
+    def update(self, instance, validated_data):
+        """Update a recepi, applying only the changed tags/ingredients"""
+        links = {name: validated_data.pop(name)
+                 for name in ('ingredients', 'tags') if name in validated_data}
+        with transaction.atomic():
+            for name, objs in links.items():
+                bulk.set_related(instance, name, objs)
+            # saving sends the signals that reindex the recepi and bump
+            # the user version, after the links are in place
+            return super().update(instance, validated_data)
 
 
 class RecepiDetailSerializer(RecepiSerializer):
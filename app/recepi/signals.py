@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recepi
+
+from recepi import search, versions
+
+
+@receiver(post_save, sender=Recepi)
+def index_recepi(sender, instance, **kwargs):
+    """Refresh the search document of a saved recepi"""
+    search.reindex([instance.pk])
+
+
+@receiver(post_delete, sender=Recepi)
+def unindex_recepi(sender, instance, **kwargs):
+    """Drop the search document of a deleted recepi"""
+    search.unindex([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed(sender, instance, created, **kwargs):
+    """Refresh the recepis using a tag or ingredient that changed"""
+    if created:
+        return
+    search.reindex(instance.recepi_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_linked(sender, instance, **kwargs):
+    """Keep the recepis of a tag or ingredient about to be deleted, its
+    links are deleted without m2m_changed"""
+    instance._search_reindex = list(
+        instance.recepi_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_unlinked(sender, instance, **kwargs):
+    """Refresh the recepis that used a deleted tag or ingredient"""
+    search.reindex(getattr(instance, '_search_reindex', []))
+
+
+@receiver(m2m_changed, sender=Recepi.tags.through)
+@receiver(m2m_changed, sender=Recepi.ingredients.through)
+def index_relinked(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh the recepis whose tags or ingredients changed"""
+    if action == 'pre_clear' and reverse:
+        # the cleared recepis are only known before the clear
+        instance._search_reindex = list(
+            instance.recepi_set.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        search.reindex([instance.pk])
+    elif action == 'post_clear':
+        search.reindex(getattr(instance, '_search_reindex', []))
+    else:
+        search.reindex(pk_set)
+
+
+@receiver(post_save, sender=Recepi)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recepi)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_version(sender, instance, **kwargs):
+    """Invalidate the cached responses of the owner of a changed object"""
+    versions.bump(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recepi.tags.through)
+@receiver(m2m_changed, sender=Recepi.ingredients.through)
+def bump_version_relinked(sender, instance, action, **kwargs):
+    """Invalidate the cached responses when recepi links change"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versions.bump(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def start_version(sender, instance, created, **kwargs):
+    """Never serve a new user what was cached for a reused pk"""
+    if created:
+        versions.bump(instance.pk)
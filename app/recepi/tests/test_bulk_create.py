@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+TAGS_URL = reverse('recepi:tag-list')
+INGREDIENTS_URL = reverse('recepi:ingredient-list')
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+class BulkCreateTests(TestCase):
+    """Test creating lists of objects in one request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'bulk@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating many tags at once"""
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+        res = self.client.post(TAGS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Vegan', 'Dessert']
+        )
+        self.assertEqual(
+            sorted(Tag.objects.values_list('id', flat=True)),
+            sorted(tag['id'] for tag in res.data)
+        )
+
+    def test_bulk_create_ingredients(self):
+        """Test creating many ingredients at once"""
+        payload = [{'name': 'Salt'}, {'name': 'Kale'}, {'name': 'Ginger'}]
+        res = self.client.post(INGREDIENTS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_create_recepis_with_links(self):
+        """Test creating many recepis with tags and ingredients"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        payload = [{
+            'title': 'Recepi %d' % i,
+            'time_minutes': 10,
+            'price': '5.00',
+            'tags': [tag.id],
+            'ingredients': [ingredient.id] if i % 2 else [],
+        } for i in range(50)]
+
+        res = self.client.post(RECEPIS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 50)
+        recipe = Recepi.objects.get(id=res.data[1]['id'])
+        self.assertEqual(recipe.title, 'Recepi 1')
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertEqual(list(recipe.ingredients.all()), [ingredient])
+        self.assertEqual(res.data[1]['ingredients'], [ingredient.id])
+        self.assertEqual(tag.recepi_set.count(), 50)
+        self.assertEqual(ingredient.recepi_set.count(), 25)
+
+    def test_bulk_create_queries_constant(self):
+        """Test the number of queries does not grow with the items"""
+        def count_queries(items):
+            payload = [{'name': 'tag %d' % i} for i in range(items)]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(TAGS_URL, payload, format='json')
+            return len(queries)
+
+        self.assertEqual(count_queries(10), count_queries(300))
+
+    def test_bulk_create_recepis_queries_constant(self):
+        """Test validating the tags and ingredients of many recepis does
+        not query per item"""
+        tags = [Tag.objects.create(user=self.user, name='tag %d' % i)
+                for i in range(3)]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name='ing %d' % i)
+            for i in range(5)
+        ]
+
+        def count_queries(items):
+            payload = [{
+                'title': 'Recepi %d' % i,
+                'time_minutes': 10,
+                'price': '5.00',
+                'tags': [tags[i % 3].id],
+                'ingredients': [ingredients[i % 5].id, ingredients[0].id],
+            } for i in range(items)]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECEPIS_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        # 100 items stay within one insert batch on SQLite
+        self.assertEqual(count_queries(10), count_queries(100))
+
+    def test_bulk_create_recepis_unknown_links(self):
+        """Test links to missing or foreign objects are reported per item"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'te4s134'
+        )
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        foreign = Tag.objects.create(user=other, name='Dessert')
+        payload = [{
+            'title': 'Recepi %d' % i,
+            'time_minutes': 10,
+            'price': '5.00',
+            'tags': tags,
+            'ingredients': [],
+        } for i, tags in enumerate([[tag.id], [foreign.id], ['x']])]
+
+        res = self.client.post(RECEPIS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('tags', res.data[1])
+        self.assertIn('tags', res.data[2])
+        self.assertFalse(Recepi.objects.exists())
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test invalid items are reported and nothing is created"""
+        payload = [{'name': 'Vegan'}, {'name': ''}]
+        res = self.client.post(TAGS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_create_limit(self):
+        """Test payloads over the limit are rejected"""
+        payload = [{'name': 'tag'}] * 10001
+        res = self.client.post(TAGS_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
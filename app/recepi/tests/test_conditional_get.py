@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag
+
+from recepi import mixins, versions
+
+TAGS_URL = reverse('recepi:tag-list')
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def detail_url(recepi_id):
+    """Return recepi detail URL"""
+    return reverse('recepi:recepi-detail', args=[recepi_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Test the ETag / If-None-Match handling of the recepi API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'etag@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recepi.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5.00
+        )
+
+    def test_unchanged_list_not_modified(self):
+        """Test an unchanged list is answered with 304 and no queries"""
+        res = self.client.get(RECEPIS_URL)
+        etag = res['ETag']
+        hits = mixins.CONDITIONAL_HITS.value
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECEPIS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(mixins.CONDITIONAL_HITS.value, hits + 1)
+
+    def test_change_invalidates_etag(self):
+        """Test saving, linking and deleting objects changes the ETag"""
+        etag = self.client.get(RECEPIS_URL)['ETag']
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.assertNotEqual(self.client.get(RECEPIS_URL)['ETag'], etag)
+
+        etag = self.client.get(RECEPIS_URL)['ETag']
+        self.recipe.tags.add(tag)
+        res = self.client.get(RECEPIS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        self.recipe.delete()
+        res = self.client.get(RECEPIS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query(self):
+        """Test different query params get different ETags"""
+        first = self.client.get(TAGS_URL)['ETag']
+        second = self.client.get(TAGS_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
+
+    def test_etag_scoped_to_user(self):
+        """Test another user's changes do not change the ETag"""
+        etag = self.client.get(TAGS_URL)['ETag']
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        Tag.objects.create(user=other, name='Vegan')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_not_modified(self):
+        """Test an unchanged recepi detail is answered with 304"""
+        url = detail_url(self.recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_bulk_create_invalidates_etag(self):
+        """Test bulk creates change the ETag"""
+        etag = self.client.get(TAGS_URL)['ETag']
+        self.client.post(TAGS_URL, [{'name': 'Vegan'}], format='json')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(RECEPI_CONDITIONAL_ENABLED=False)
+    def test_conditional_disabled(self):
+        """Test no ETag is sent when conditional lists are off"""
+        res = self.client.get(RECEPIS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.has_header('ETag'))
+
+
+class VersionCommitTests(TransactionTestCase):
+    """Test the data version around transactions"""
+
+    def test_bump_again_on_commit(self):
+        """Test a version read before the commit of a change is stale
+        after it"""
+        versions.get(1)
+        with transaction.atomic():
+            versions.bump(1)
+            # a concurrent request caching the old rows under this one
+            seen = versions.get(1)
+
+        self.assertNotEqual(versions.get(1), seen)
+
+    def test_no_bump_on_rollback(self):
+        """Test a rolled back change is only bumped once"""
+        start = versions.get(1)
+        try:
+            with transaction.atomic():
+                versions.bump(1)
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(versions.get(1), start + 1)
@@ -0,0 +1,96 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+EXPORT_URL = reverse('recepi:recepi-export')
+
+
+class RecepiExportTests(TestCase):
+    """Test streaming the recepis of the user"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'export@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        for i in range(3):
+            recipe = Recepi.objects.create(
+                user=self.user, title='Recepi %d' % i, time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        Recepi.objects.create(
+            user=other, title='Other', time_minutes=10, price=5.00
+        )
+
+    def test_export_ndjson(self):
+        """Test exporting the recepis as NDJSON"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in
+                b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [row['title'] for row in rows],
+            ['Recepi 0', 'Recepi 1', 'Recepi 2']
+        )
+        self.assertEqual(rows[0]['tags'][0]['name'], 'Vegan')
+        self.assertEqual(rows[0]['ingredients'][0]['name'], 'Salt')
+        self.assertEqual(rows[0]['price'], '5.00')
+
+    def test_export_csv_gzip(self):
+        """Test exporting the recepis as gzipped CSV"""
+        res = self.client.get(
+            EXPORT_URL, {'output': 'csv'}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        content = gzip.decompress(b''.join(res.streaming_content))
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2]['title'], 'Recepi 2')
+        self.assertEqual(rows[2]['tags'], 'Vegan')
+
+    def test_export_gzip_refused(self):
+        """Test gzip with a q-value of 0 gets the plain export"""
+        res = self.client.get(
+            EXPORT_URL, HTTP_ACCEPT_ENCODING='br, gzip;q=0'
+        )
+
+        self.assertNotIn('Content-Encoding', res)
+        self.assertIn('Accept-Encoding', res['Vary'])
+        rows = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 3)
+
+    def test_export_queries_per_chunk(self):
+        """Test the export runs a constant number of queries per chunk"""
+        with self.assertNumQueries(3):
+            res = self.client.get(EXPORT_URL)
+            b''.join(res.streaming_content)
+
+    def test_export_invalid_output(self):
+        """Test unknown export formats are rejected"""
+        res = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
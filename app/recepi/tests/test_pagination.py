@@ -0,0 +1,95 @@
+import json
+from base64 import urlsafe_b64encode
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag
+
+TAGS_URL = reverse('recepi:tag-list')
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+class KeysetPaginationTests(TestCase):
+    """Test the cursor pagination of the list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'pages@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        """Follow the next links and return every page"""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            url = res.data['next']
+
+        return pages
+
+    def test_walk_tags_with_duplicate_names(self):
+        """Test paging tags sharing names returns every tag once"""
+        for name in ['Vegan', 'Dessert', 'Vegan', 'Dessert', 'Vegan']:
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self.walk(TAGS_URL + '?page_size=2')
+
+        ids = [tag['id'] for page in pages for tag in page['results']]
+        expected = Tag.objects.order_by('-name', 'id')
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(ids, [tag.id for tag in expected])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link(self):
+        """Test the previous link returns the page before"""
+        for i in range(5):
+            Recepi.objects.create(
+                user=self.user, title='r%d' % i, time_minutes=5, price=5
+            )
+        first = self.client.get(RECEPIS_URL + '?page_size=2').data
+        second = self.client.get(first['next']).data
+
+        res = self.client.get(second['previous'])
+
+        self.assertEqual(res.data['results'], first['results'])
+        self.assertIsNotNone(res.data['next'])
+
+    def test_later_pages_same_queries(self):
+        """Test seeking to a later page costs the same as the first"""
+        for i in range(6):
+            Tag.objects.create(user=self.user, name='tag %d' % i)
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL + '?page_size=2')
+        with self.assertNumQueries(1):
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_invalid_cursor(self):
+        """Test an invalid cursor returns not found"""
+        res = self.client.get(TAGS_URL + '?cursor=garbage')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_invalid_values(self):
+        """Test a well-formed cursor with values of the wrong type is
+        not found"""
+        for url, position in ((RECEPIS_URL, ['abc']),
+                              (RECEPIS_URL, [None]),
+                              (TAGS_URL, ['Vegan', 'abc'])):
+            cursor = urlsafe_b64encode(
+                json.dumps({'p': position, 'r': 0}).encode('utf-8')
+            ).decode('ascii')
+
+            res = self.client.get(url, {'cursor': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -73,7 +73,7 @@ class PrivateRecipeApiTEst(TestCase):
         recipes = Recepi.objects.all().order_by('-id')
         serializer = RecepiSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """TEst retrieven recipes for current user"""
@@ -89,8 +89,8 @@ class PrivateRecipeApiTEst(TestCase):
         recipes = Recepi.objects.filter(user=self.user)
         serializer = RecepiSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recepi_detail(self):
         """test viewing a recipe detail"""
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+from recepi.serializers import RecepiDetailSerializer
+
+BATCH_URL = reverse('recepi:recepi-batch')
+
+
+def sample_recipe(user, title):
+    """create and return a sample recepi"""
+    return Recepi.objects.create(
+        user=user, title=title, time_minutes=10, price=5.00
+    )
+
+
+class RecepiBatchTests(TestCase):
+    """Test fetching many recepi details in one request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'batch@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipes = []
+        for i in range(5):
+            recipe = sample_recipe(self.user, 'Recepi %d' % i)
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+
+    def get(self, ids, **params):
+        return self.client.get(
+            BATCH_URL, dict(params, ids=','.join(str(pk) for pk in ids))
+        )
+
+    def test_batch_preserves_order(self):
+        """Test details are returned in the requested order"""
+        ids = [self.recipes[3].id, self.recipes[0].id, self.recipes[4].id]
+        with self.assertNumQueries(3):
+            res = self.get(ids)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], RecepiDetailSerializer(
+            [self.recipes[3], self.recipes[0], self.recipes[4]], many=True
+        ).data)
+        self.assertEqual(res.data['missing'], [])
+
+    def test_batch_reports_missing(self):
+        """Test unknown and other users' ids are reported as missing"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        foreign = sample_recipe(other, 'Foreign')
+
+        res = self.get([self.recipes[1].id, foreign.id, 999999])
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [self.recipes[1].id]
+        )
+        self.assertEqual(res.data['missing'], [foreign.id, 999999])
+
+    def test_batch_sparse_fields(self):
+        """Test the fields param applies to the batch"""
+        res = self.get([self.recipes[0].id], fields='id,title')
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipes[0].id, 'title': 'Recepi 0'}]
+        )
+
+    @override_settings(RECEPI_BATCH_MAX_IDS=2)
+    def test_batch_limit(self):
+        """Test requesting more ids than allowed fails"""
+        res = self.get([recipe.id for recipe in self.recipes[:3]])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_requires_ids(self):
+        """Test the ids param is required"""
+        res = self.client.get(BATCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
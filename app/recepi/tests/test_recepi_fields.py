@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def detail_url(recepi_id):
+    """Return recepi detail URL"""
+    return reverse('recepi:recepi-detail', args=[recepi_id])
+
+
+class RecepiFieldsTests(TestCase):
+    """Test the ?fields= and ?expand= query params"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'fields@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+        for i in range(3):
+            recipe = Recepi.objects.create(
+                user=self.user, title='Recepi %d' % i, time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+
+    def test_list_sparse_fields(self):
+        """Test only the requested fields and columns are fetched"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECEPIS_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        latest = Recepi.objects.latest('id')
+        self.assertEqual(
+            res.data['results'][0], {'id': latest.id, 'title': 'Recepi 2'}
+        )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('price', queries[0]['sql'])
+
+    def test_list_expand(self):
+        """Test nesting tags and ingredients in the list"""
+        with self.assertNumQueries(3):
+            res = self.client.get(RECEPIS_URL, {'expand': 'tags,ingredients'})
+
+        recipe = res.data['results'][0]
+        self.assertEqual(
+            recipe['tags'], [{'id': self.tag.id, 'name': 'Vegan'}]
+        )
+        self.assertEqual(
+            recipe['ingredients'],
+            [{'id': self.ingredient.id, 'name': 'Salt'}]
+        )
+
+    def test_list_fields_and_expand(self):
+        """Test combining sparse fields and expanded relations"""
+        with self.assertNumQueries(2):
+            res = self.client.get(
+                RECEPIS_URL, {'fields': 'title,tags', 'expand': 'tags'}
+            )
+
+        self.assertEqual(res.data['results'][0], {
+            'title': 'Recepi 2', 'tags': [{'id': self.tag.id, 'name': 'Vegan'}]
+        })
+
+    def test_retrieve_sparse_fields(self):
+        """Test narrowing the fields of a recepi detail"""
+        recipe = Recepi.objects.first()
+        res = self.client.get(detail_url(recipe.id), {'fields': 'tags'})
+
+        self.assertEqual(
+            res.data, {'tags': [{'id': self.tag.id, 'name': 'Vegan'}]}
+        )
+
+    def test_unknown_fields(self):
+        """Test unknown fields and relations are rejected"""
+        res = self.client.get(RECEPIS_URL, {'fields': 'id,secret'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECEPIS_URL, {'expand': 'title'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def sample_recipe(user, title):
+    """create and return a sample recepi"""
+    return Recepi.objects.create(
+        user=user, title=title, time_minutes=10, price=5.00
+    )
+
+
+class RecepiFilterTests(TestCase):
+    """Test filtering recepis by tags and ingredients"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'filters@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dessert = Tag.objects.create(user=self.user, name='Dessert')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.curry = sample_recipe(self.user, 'Curry')
+        self.curry.tags.add(self.vegan)
+        self.curry.ingredients.add(self.salt)
+        self.cake = sample_recipe(self.user, 'Cake')
+        self.cake.tags.add(self.vegan, self.dessert)
+        self.steak = sample_recipe(self.user, 'Steak')
+
+    def titles(self, params):
+        res = self.client.get(RECEPIS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return {recipe['title'] for recipe in res.data['results']}
+
+    def test_filter_any_tags(self):
+        """Test returning recepis with any of the tags"""
+        titles = self.titles({
+            'tags': '%d,%d' % (self.vegan.id, self.dessert.id)
+        })
+
+        self.assertEqual(titles, {'Curry', 'Cake'})
+
+    def test_filter_all_tags(self):
+        """Test returning recepis with all of the tags"""
+        titles = self.titles({
+            'tags': '%d,%d' % (self.vegan.id, self.dessert.id),
+            'match': 'all',
+        })
+
+        self.assertEqual(titles, {'Cake'})
+
+    def test_filter_tags_and_ingredients(self):
+        """Test tags and ingredients filters are combined"""
+        titles = self.titles({
+            'tags': str(self.vegan.id),
+            'ingredients': str(self.salt.id),
+        })
+
+        self.assertEqual(titles, {'Curry'})
+
+    def test_filter_without_distinct(self):
+        """Test the filter uses a subquery instead of DISTINCT"""
+        with CaptureQueriesContext(connection) as queries:
+            self.titles({'tags': '%d,%d' % (self.vegan.id, self.dessert.id)})
+
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIn('IN (SELECT', sql)
+
+    def test_filter_invalid_ids(self):
+        """Test invalid ids are rejected"""
+        res = self.client.get(RECEPIS_URL, {'tags': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def detail_url(recepi_id):
+    """Return recepi detail URL"""
+    return reverse('recepi:recepi-detail', args=[recepi_id])
+
+
+def sample_recipe(user, tags=2, ingredients=2, **params):
+    """create a recepi linked to a few tags and ingredients"""
+    defaults = {
+        'title': 'Sample_recepi',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+    recipe = Recepi.objects.create(user=user, **defaults)
+    for i in range(tags):
+        recipe.tags.add(Tag.objects.create(user=user, name='tag %d' % i))
+    for i in range(ingredients):
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=user, name='ingredient %d' % i)
+        )
+
+    return recipe
+
+
+class RecepiQueryCountTests(TestCase):
+    """Test the recepi endpoints run a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'queries@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries_constant(self):
+        """Test listing recepis does not query per recepi"""
+        sample_recipe(user=self.user)
+        # recepis, tags and ingredients
+        with self.assertNumQueries(3):
+            res = self.client.get(RECEPIS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        for _ in range(10):
+            sample_recipe(user=self.user)
+        with self.assertNumQueries(3):
+            res = self.client.get(RECEPIS_URL)
+        self.assertEqual(len(res.data['results']), 11)
+
+    def test_list_related_pks(self):
+        """Test the prefetched list still renders the related pks"""
+        recipe = sample_recipe(user=self.user)
+
+        res = self.client.get(RECEPIS_URL)
+
+        self.assertEqual(
+            sorted(res.data['results'][0]['tags']),
+            sorted(recipe.tags.values_list('id', flat=True))
+        )
+        self.assertEqual(
+            sorted(res.data['results'][0]['ingredients']),
+            sorted(recipe.ingredients.values_list('id', flat=True))
+        )
+
+    def test_retrieve_queries_constant(self):
+        """Test retrieving a recepi does not query per related object"""
+        recipe = sample_recipe(user=self.user, tags=1, ingredients=1)
+        with self.assertNumQueries(3):
+            self.client.get(detail_url(recipe.id))
+
+        recipe = sample_recipe(user=self.user, tags=20, ingredients=20)
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(len(res.data['tags']), 20)
+        self.assertEqual(len(res.data['ingredients']), 20)
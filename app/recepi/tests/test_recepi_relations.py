@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+from recepi.serializers import RecepiSerializer
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def detail_url(recepi_id):
+    """Return recepi detail URL"""
+    return reverse('recepi:recepi-detail', args=[recepi_id])
+
+
+class RecepiRelationsTests(TestCase):
+    """Test validating the tags and ingredients of a recepi"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'relations@gmail.com',
+            'te4s134'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        self.client.force_authenticate(self.user)
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name='Ing %d' % i)
+            for i in range(40)
+        ]
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.payload = {
+            'title': 'Stew',
+            'time_minutes': 30,
+            'price': '7.00',
+            'tags': [self.tag.id],
+            'ingredients': [ingredient.id for ingredient
+                            in reversed(self.ingredients)],
+        }
+
+    def serializer(self, data, **kwargs):
+        request = RequestFactory().post(RECEPIS_URL)
+        request.user = self.user
+        return RecepiSerializer(
+            data=data, context={'request': request}, **kwargs
+        )
+
+    def test_validate_in_one_query_per_relation(self):
+        """Test 40 ingredients are validated with one query"""
+        serializer = self.serializer(self.payload)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(
+            serializer.validated_data['ingredients'],
+            list(reversed(self.ingredients))
+        )
+
+    def test_create_with_other_users_ingredient(self):
+        """Test linking another user's ingredient is rejected"""
+        foreign = Ingredient.objects.create(user=self.other, name='Salt')
+        self.payload['ingredients'] = [self.ingredients[0].id, foreign.id]
+
+        res = self.client.post(RECEPIS_URL, self.payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ingredients', res.data)
+        self.assertFalse(Recepi.objects.exists())
+
+    def test_update_with_other_users_tag(self):
+        """Test updating with another user's tag is rejected"""
+        recipe = Recepi.objects.create(
+            user=self.user, title='Soup', time_minutes=5, price=2
+        )
+        foreign = Tag.objects.create(user=self.other, name='Dessert')
+
+        res = self.client.patch(
+            detail_url(recipe.id), {'tags': [foreign.id]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(recipe.tags.count(), 0)
+
+    def test_invalid_pk_type(self):
+        """Test a pk that isn't an integer is rejected"""
+        self.payload['tags'] = ['vegan']
+        serializer = self.serializer(self.payload)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tags', serializer.errors)
+
+    def test_duplicate_pks(self):
+        """Test repeated pks validate to the same object"""
+        self.payload['tags'] = [self.tag.id, self.tag.id]
+        serializer = self.serializer(self.payload)
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['tags'],
+                         [self.tag, self.tag])
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+def sample_recipe(user, title):
+    """create and return a sample recepi"""
+    return Recepi.objects.create(
+        user=user, title=title, time_minutes=10, price=5.00
+    )
+
+
+class RecepiSearchTests(TestCase):
+    """Test the full-text search of recepis"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'search@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, text):
+        res = self.client.get(RECEPIS_URL, {'search': text})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_title(self):
+        """Test searching recepis by title words"""
+        sample_recipe(self.user, 'Thai prawn curry')
+        sample_recipe(self.user, 'Chocolate cake')
+
+        self.assertEqual(self.search('curry'), ['Thai prawn curry'])
+
+    def test_search_ranks_title_first(self):
+        """Test title matches rank above tag and ingredient matches"""
+        by_ingredient = sample_recipe(self.user, 'Green salad')
+        by_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Avocado')
+        )
+        sample_recipe(self.user, 'Avocado toast')
+
+        self.assertEqual(
+            self.search('avocado'), ['Avocado toast', 'Green salad']
+        )
+
+    def test_index_follows_m2m_changes(self):
+        """Test adding and removing tags updates the search index"""
+        recipe = sample_recipe(self.user, 'Pancakes')
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+
+        recipe.tags.add(tag)
+        self.assertEqual(self.search('breakfast'), ['Pancakes'])
+
+        recipe.tags.remove(tag)
+        self.assertEqual(self.search('breakfast'), [])
+
+    def test_index_follows_renames(self):
+        """Test renaming a tag or the recepi updates the search index"""
+        recipe = sample_recipe(self.user, 'Pancakes')
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        recipe.tags.add(tag)
+
+        tag.name = 'Brunch'
+        tag.save()
+        recipe.title = 'Waffles'
+        recipe.save()
+
+        self.assertEqual(self.search('brunch'), ['Waffles'])
+        self.assertEqual(self.search('pancakes'), [])
+
+    def test_index_follows_deletes(self):
+        """Test deleting a tag or ingredient updates the search index"""
+        recipe = sample_recipe(self.user, 'Pancakes')
+        tag = Tag.objects.create(user=self.user, name='Zucchini')
+        ingredient = Ingredient.objects.create(user=self.user, name='Oats')
+        recipe.tags.add(tag)
+        recipe.ingredients.add(ingredient)
+
+        tag.delete()
+        ingredient.delete()
+
+        self.assertEqual(self.search('zucchini'), [])
+        self.assertEqual(self.search('oats'), [])
+        self.assertEqual(self.search('pancakes'), ['Pancakes'])
+
+    def test_search_limited_to_user(self):
+        """Test search only returns recepis of the authenticated user"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        sample_recipe(other, 'Curry')
+        recipe = sample_recipe(self.user, 'Curry')
+        recipe.delete()
+
+        self.assertEqual(self.search('curry'), [])
+
+    def test_search_special_characters(self):
+        """Test search text is never parsed as query syntax"""
+        sample_recipe(self.user, 'Mac "n" cheese')
+
+        self.assertEqual(self.search('cheese"*('), ['Mac "n" cheese'])
+        self.assertEqual(self.search('AND OR NOT'), [])
+
+    def test_search_pages(self):
+        """Test paging through ranked results"""
+        for i in range(5):
+            sample_recipe(self.user, 'Curry %d' % i)
+
+        first = self.client.get(
+            RECEPIS_URL, {'search': 'curry', 'page_size': 2}
+        ).data
+        titles = [recipe['title'] for recipe in first['results']]
+        url = first['next']
+        while url:
+            page = self.client.get(url).data
+            titles += [recipe['title'] for recipe in page['results']]
+            url = page['next']
+
+        self.assertEqual(sorted(titles), ['Curry %d' % i for i in range(5)])
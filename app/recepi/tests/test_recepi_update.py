@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+from recepi import versions
+
+
+def detail_url(recepi_id):
+    """Return recepi detail URL"""
+    return reverse('recepi:recepi-detail', args=[recepi_id])
+
+
+class RecepiUpdateTests(TestCase):
+    """Test updating the tags and ingredients of a recepi"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'update@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name='Ing %d' % i)
+            for i in range(80)
+        ]
+        self.tags = [
+            Tag.objects.create(user=self.user, name='Tag %d' % i)
+            for i in range(3)
+        ]
+        self.recipe = Recepi.objects.create(
+            user=self.user, title='Stew', time_minutes=30, price=7
+        )
+        self.recipe.ingredients.set(self.ingredients[:40])
+        self.recipe.tags.set(self.tags[:2])
+
+    def patch(self, payload):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                detail_url(self.recipe.id), payload, format='json'
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res, len(queries)
+
+    def ids(self, objs):
+        return [obj.id for obj in objs]
+
+    def test_update_applies_diff(self):
+        """Test links are added and removed to match the payload"""
+        wanted = self.ingredients[20:60]
+        res, _ = self.patch({
+            'ingredients': self.ids(wanted),
+            'tags': self.ids(self.tags[1:]),
+        })
+
+        self.assertEqual(
+            sorted(self.recipe.ingredients.values_list('id', flat=True)),
+            self.ids(wanted)
+        )
+        self.assertEqual(
+            sorted(self.recipe.tags.values_list('id', flat=True)),
+            self.ids(self.tags[1:])
+        )
+        self.assertEqual(sorted(res.data['ingredients']), self.ids(wanted))
+
+    def test_update_query_count_is_constant(self):
+        """Test the queries don't grow with the number of ingredients"""
+        _, small = self.patch({
+            'ingredients': self.ids(self.ingredients[38:42])
+        })
+        self.recipe.ingredients.set(self.ingredients[:40])
+        _, large = self.patch({
+            'ingredients': self.ids(self.ingredients[30:70])
+        })
+
+        self.assertEqual(small, large)
+
+    def test_update_relation_queries(self):
+        """Test each changed relation takes one read, insert and delete"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(detail_url(self.recipe.id), {
+                'ingredients': self.ids(self.ingredients[20:60]),
+            }, format='json')
+
+        through = [query['sql'] for query in queries
+                   if 'core_recepi_ingredients' in query['sql']
+                   and 'core_recepi_search' not in query['sql']
+                   and 'core_recepi r' not in query['sql']]
+        # read, insert, delete, then the response reads the links back
+        self.assertEqual(
+            [sql.split()[0] for sql in through],
+            ['SELECT', 'INSERT', 'DELETE', 'SELECT']
+        )
+
+    def test_update_without_relations_keeps_links(self):
+        """Test a patch without relations leaves the links alone"""
+        self.patch({'title': 'Soup'})
+
+        self.assertEqual(self.recipe.ingredients.count(), 40)
+        self.assertEqual(self.recipe.tags.count(), 2)
+
+    def test_update_reindexes_and_bumps_version(self):
+        """Test the search document and the user version follow the links"""
+        onion = Ingredient.objects.create(user=self.user, name='Onion')
+        version = versions.get(self.user.id)
+
+        self.patch({'ingredients': [onion.id]})
+
+        self.assertNotEqual(versions.get(self.user.id), version)
+        res = self.client.get(
+            reverse('recepi:recepi-list'), {'search': 'onion'}
+        )
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [self.recipe.id]
+        )
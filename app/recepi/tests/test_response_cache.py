@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag
+
+from recepi import mixins
+
+TAGS_URL = reverse('recepi:tag-list')
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+class ResponseCacheTests(TestCase):
+    """Test the cached list responses"""
+
+    def setUp(self):
+        caches['responses'].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'cache@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        Recepi.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5.00
+        )
+
+    def test_warm_list_no_queries(self):
+        """Test a cached list is served without any query"""
+        res = self.client.get(RECEPIS_URL)
+        hits = mixins.RESPONSE_CACHE_HITS.value
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECEPIS_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, res.content)
+        self.assertEqual(cached['ETag'], res['ETag'])
+        self.assertEqual(cached['Content-Type'], res['Content-Type'])
+        self.assertEqual(mixins.RESPONSE_CACHE_HITS.value, hits + 1)
+
+    def test_change_invalidates_cached_list(self):
+        """Test changes are visible right after they are made"""
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.json()['results'][0]['name'], 'Vegan')
+
+    def test_cache_scoped_to_user(self):
+        """Test users never see each other's cached lists"""
+        self.client.get(RECEPIS_URL)
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'pass132'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECEPIS_URL)
+
+        self.assertEqual(res.json()['results'], [])
+
+    def test_errors_not_cached(self):
+        """Test failing requests are not cached"""
+        hits = mixins.RESPONSE_CACHE_HITS.value
+        self.client.get(RECEPIS_URL, {'tags': 'bad'})
+
+        res = self.client.get(RECEPIS_URL, {'tags': 'bad'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(mixins.RESPONSE_CACHE_HITS.value, hits)
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recepi, Tag, Ingredient
+
+from recepi.mixins import ValuesListMixin
+from recepi.views import TagViewSet, IngredientViewSet, RecepiViewSet
+
+TAGS_URL = reverse('recepi:tag-list')
+INGREDIENTS_URL = reverse('recepi:ingredient-list')
+RECEPIS_URL = reverse('recepi:recepi-list')
+
+
+class ValuesListTests(TestCase):
+    """Test the values() list path renders what the serializers do"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'values@gmail.com',
+            'te4s134'
+        )
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(user=self.user, name='tag %d' % i)
+                for i in range(3)]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name='ingredient %d' % i)
+            for i in range(3)
+        ]
+        for i in range(5):
+            recipe = Recepi.objects.create(
+                user=self.user, title='Recepi %d' % i, time_minutes=i,
+                price='%d.50' % i, link='http://example.com' if i else ''
+            )
+            recipe.tags.add(*tags[:i % 4])
+            recipe.ingredients.add(*ingredients[i % 2:])
+
+    def walk(self, url, params):
+        """Return the items of every page of the list"""
+        caches['responses'].clear()
+        page = self.client.get(url, dict(params or {}, page_size=2)).json()
+        items = page['results']
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            items += page['results']
+
+        return items
+
+    def compare(self, viewset, url, params=None):
+        """Assert both list paths return the same content"""
+        fast = self.walk(url, params)
+        with patch.object(viewset, 'values_list_enabled', False):
+            slow = self.walk(url, params)
+
+        self.assertEqual(fast, slow)
+        return fast
+
+    def test_opt_in(self):
+        """Test only the views enabling the fast path use it"""
+        self.assertFalse(ValuesListMixin.values_list_enabled)
+        for viewset in (TagViewSet, IngredientViewSet, RecepiViewSet):
+            self.assertTrue(viewset.values_list_enabled)
+
+    def test_tags_identical(self):
+        """Test the tags list is identical on both paths"""
+        self.compare(TagViewSet, TAGS_URL)
+
+    def test_ingredients_identical(self):
+        """Test the ingredients list is identical on both paths"""
+        self.compare(IngredientViewSet, INGREDIENTS_URL)
+
+    def test_recepis_identical(self):
+        """Test the recepis list is identical on both paths"""
+        items = self.compare(RecepiViewSet, RECEPIS_URL)
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items[0]['price'], '4.50')
+
+    def test_recepis_search_identical(self):
+        """Test the search results are identical on both paths"""
+        self.compare(RecepiViewSet, RECEPIS_URL, {'search': 'recepi'})
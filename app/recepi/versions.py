@@ -0,0 +1,54 @@
+"""Per-user data version, bumped whenever a recepi, tag or ingredient of
+the user changes. List responses are tagged with it so unchanged data can
+be answered with 304 without touching the recepi tables.
+
+The version lives in the `RECEPI_VERSION_CACHE` cache alias, which must be
+shared between workers in production. A missing version starts from the
+current time in nanoseconds, so it never goes back to an older value once
+evicted.
+
+A bump inside a transaction is applied again once the transaction
+commits: a concurrent request that read the bumped version before the
+commit may have cached the old rows under it, the second bump retires
+them.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _cache():
+    return caches[getattr(settings, 'RECEPI_VERSION_CACHE', 'default')]
+
+
+def _key(user_id):
+    return 'recepi:version:%s' % user_id
+
+
+def get(user_id):
+    """Return the current data version of the user"""
+    cache = _cache()
+    version = cache.get(_key(user_id))
+    if version is None:
+        cache.add(_key(user_id), time.time_ns(), None)
+        version = cache.get(_key(user_id))
+
+    return version
+
+
+def bump(user_id):
+    """Move the data version of the user forward, again on commit"""
+    _bump(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    cache = _cache()
+    try:
+        cache.incr(_key(user_id))
+    except ValueError:
+        if not cache.add(_key(user_id), time.time_ns(), None):
+            cache.incr(_key(user_id))
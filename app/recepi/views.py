@@ -1,22 +1,45 @@
+from django.conf import settings
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+
 from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
+from core import export as exporter
+from core.profiling import ProfilingMixin
 from core.models import Tag, Ingredient, Recepi
 
-from recepi import serializers
+from user.authentication import CachedTokenAuthentication
+
+from recepi import search, serializers
+from recepi.mixins import BulkCreateModelMixin, ConditionalListMixin, \
+    ValuesListMixin
+from recepi.pagination import KeysetPagination
 
 
-class BaseRecepiViewSet(viewsets.GenericViewSet,
+class BaseRecepiViewSet(ProfilingMixin,
+                        BulkCreateModelMixin,
+                        ConditionalListMixin,
+                        ValuesListMixin,
+                        viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.CreateModelMixin):
     """Base model to refact the classes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    ordering = ('-name', 'id')
+    values_list_enabled = True
 
     def get_queryset(self):
         """Returns objects only for authenticated user"""
-        return self.queryset.filter(user = self.request.user).order_by('-name')
+        return self.queryset.filter(
+            user=self.request.user
+        ).order_by(*self.ordering)
 
     def perform_create(self, serializer):
         """Create a new object"""
@@ -37,20 +60,198 @@ class IngredientViewSet(BaseRecepiViewSet):
     serializer_class = serializers.IngredientSerializer
 
 
-class RecepiViewSet(viewsets.ModelViewSet):
+class RecepiViewSet(ProfilingMixin,
+                    BulkCreateModelMixin,
+                    ConditionalListMixin,
+                    ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Manage recepis in database"""
     serializer_class = serializers.RecepiSerializer
     queryset = Recepi.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = KeysetPagination
+    ordering = ('-id',)
+    values_list_enabled = True
+
+    def _params_to_ints(self, name):
+        """Convert a comma separated query param to a list of ints"""
+        value = self.request.query_params.get(name)
+        if not value:
+            return []
+        try:
+            return [int(str_id) for str_id in value.split(',')]
+        except ValueError:
+            raise ValidationError({name: 'Expected comma separated ids'})
+
+    def _filter_related(self, queryset, field, ids, match_all):
+        """Filter recepis linked to any/all ids through an IN subquery,
+        so no join or DISTINCT is needed over the through table"""
+        relation = getattr(Recepi, field)
+        links = relation.through.objects.filter(**{
+            '%s_id__in' % relation.field.m2m_reverse_field_name(): ids
+        }).values('recepi_id')
+        if match_all:
+            links = links.annotate(
+                matches=Count('recepi_id')
+            ).filter(matches=len(set(ids)))
+
+        return queryset.filter(id__in=links.values('recepi_id'))
+
+    def get_ordering(self):
+        """Rank search results by relevance, newest first otherwise"""
+        if self.action == 'list' and 'search' in self.request.query_params:
+            return ('-rank',) + self.ordering
+
+        return self.ordering
+
+    def _filter_list(self, queryset):
+        """Apply the search and tags/ingredients filters of the list"""
+        params = self.request.query_params
+        if 'search' in params:
+            queryset = search.search(queryset, params['search'])
+
+        match = params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': 'Expected any or all'})
+        for field in ('tags', 'ingredients'):
+            ids = self._params_to_ints(field)
+            if ids:
+                queryset = self._filter_related(
+                    queryset, field, ids, match == 'all'
+                )
+
+        return queryset
+
+    def _params_to_names(self, name, choices):
+        """Convert a comma separated query param to a list of names"""
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        names = [item.strip() for item in value.split(',') if item.strip()]
+        unknown = set(names) - set(choices)
+        if unknown:
+            raise ValidationError({
+                name: 'Unknown: %s' % ', '.join(sorted(unknown))
+            })
+
+        return names
+
+    def get_requested_fields(self):
+        """Return the ?fields= names, or None for all fields"""
+        return self._params_to_names(
+            'fields', self.serializer_class.Meta.fields
+        )
+
+    def get_requested_expand(self):
+        """Return the ?expand= relations to nest in the list"""
+        if self.action != 'list':
+            return []
+        return self._params_to_names(
+            'expand', self.serializer_class.expandable
+        ) or []
+
+    def _prefetch_related(self, queryset, fields, expand):
+        """Prefetch the relations in the output, in one query each"""
+        for name, model in (('tags', Tag), ('ingredients', Ingredient)):
+            if fields is not None and name not in fields:
+                continue
+            related = model.objects.order_by('id')
+            if name not in expand:
+                # only the related pks are rendered
+                related = related.only('id')
+            queryset = queryset.prefetch_related(
+                Prefetch(name, queryset=related)
+            )
+
+        return queryset
 
     def get_queryset(self):
         """REtrieve the recepis for the authenticated user"""
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action not in ('list', 'retrieve', 'batch'):
+            return queryset.order_by(*self.ordering)
+
+        fields = self.get_requested_fields()
+        if self.action == 'list':
+            queryset = self._filter_list(queryset)
+            queryset = self._prefetch_related(
+                queryset, fields, self.get_requested_expand()
+            )
+        else:
+            queryset = self._prefetch_related(
+                queryset, fields, self.serializer_class.expandable
+            )
+        if fields is not None:
+            columns = {field.name for field in Recepi._meta.concrete_fields}
+            queryset = queryset.only(
+                'id', *[name for name in fields if name in columns]
+            )
+
+        return queryset.order_by(*self.get_ordering())
+
+    def get_serializer(self, *args, **kwargs):
+        """Narrow and expand the serializer as the query params ask"""
+        if self.action in ('list', 'retrieve', 'batch'):
+            kwargs.setdefault('fields', self.get_requested_fields())
+            kwargs.setdefault('expand', self.get_requested_expand())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """Return the details of the ?ids= recepis in the requested order"""
+        return self.conditional_response(self._batch, request)
+
+    def _batch(self, request):
+        ids = list(dict.fromkeys(self._params_to_ints('ids')))
+        max_ids = getattr(settings, 'RECEPI_BATCH_MAX_IDS', 100)
+        if not ids:
+            raise ValidationError({'ids': 'Expected comma separated ids'})
+        if len(ids) > max_ids:
+            raise ValidationError({'ids': 'Expected at most %d ids' % max_ids})
+
+        found = {recepi.id: recepi
+                 for recepi in self.get_queryset().filter(id__in=ids)}
+        serializer = self.get_serializer(
+            [found[pk] for pk in ids if pk in found], many=True
+        )
+
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in ids if pk not in found],
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every recepi of the user as NDJSON or CSV"""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in exporter.FORMATS:
+            raise ValidationError({'output': 'Expected ndjson or csv'})
+        compress = exporter.accepts_gzip(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+
+        response = StreamingHttpResponse(
+            exporter.export(request.user, output, compress),
+            content_type=exporter.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="recepis.%s"' % output
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        return response
 
     def get_serializer_class(self):
         """return appropriate serializer class"""
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'batch'):
             return serializers.RecepiDetailSerializer
 
         return self.serializer_class
@@ -58,3 +259,10 @@ class RecepiViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """create a new recipe"""
         serializer.save(user = self.request.user)
+
+    def perform_bulk_create(self, serializer):
+        """create new recipes, bulk_create skips the search signals"""
+        objs = super().perform_bulk_create(serializer)
+        search.reindex([obj.pk for obj in objs])
+
+        return objs
@@ -0,0 +1,120 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Bounded LRU of token key to token, with an optional shared tier.
+
+    Entries in the local LRU expire after `timeout` seconds so a worker
+    never serves a token that another process invalidated for longer than
+    that. The shared tier is any configured django cache alias. With a
+    shared tier every eviction also bumps a shared generation counter, and
+    local entries stored under an older generation are not trusted, so a
+    token revoked by one process (e.g. an admin worker) stops working on
+    every process right away.
+
+    The local tier hands out copies: views like ManageUserView change
+    request.user in place, concurrent requests must not share it.
+    """
+    key_prefix = 'authtoken:'
+    generation_key = key_prefix + 'generation'
+
+    def __init__(self, max_size=1024, timeout=30, cache_alias=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """Return the shared cache backend, if one is configured"""
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias]
+
+    def get(self, key):
+        """Return the cached token for key or None"""
+        generation = self._generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                token, expires, stored = entry
+                if expires > time.monotonic() and stored == generation:
+                    self._entries.move_to_end(key)
+                    return copy.deepcopy(token)
+                del self._entries[key]
+
+        if self.shared is None:
+            return None
+        token = self.shared.get(self.key_prefix + key)
+        if token is not None:
+            self._store(key, token, generation)
+
+        return token
+
+    def set(self, key, token):
+        """Cache token under key in every tier"""
+        self._store(key, token, self._generation())
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, token, self.timeout)
+
+    def delete(self, *keys):
+        """Evict keys from every tier"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+            try:
+                self.shared.incr(self.generation_key)
+            except ValueError:
+                self.shared.add(self.generation_key, 1, None)
+
+    def clear(self):
+        """Empty the local tier"""
+        with self._lock:
+            self._entries.clear()
+
+    def _generation(self):
+        """Return the shared generation, local entries of older ones are
+        stale"""
+        if self.shared is None:
+            return 0
+        return self.shared.get(self.generation_key, 0)
+
+    def _store(self, key, token, generation):
+        with self._lock:
+            self._entries[key] = (
+                copy.deepcopy(token), time.monotonic() + self.timeout,
+                generation
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+    timeout=getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 30),
+    cache_alias=getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', None),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the database for known tokens"""
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+
+        return (token.user, token)
@@ -3,8 +3,10 @@ from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
 
+from core.timing import TimedListSerializer, TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Seriealizer dor the users object!"""
 
     class Meta:
@@ -13,6 +15,7 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {
             'write_only': True, 'min_length': 5
         }}
+        list_serializer_class = TimedListSerializer
 
     def create(self, validated_data):
         """Create a new user with encrypted password and return it"""
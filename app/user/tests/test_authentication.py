@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import CachedTokenAuthentication, TokenCache, \
+    token_cache
+
+ME_URL = reverse('user:me')
+
+
+class TokenCacheTests(TestCase):
+    """Test the token LRU"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused key is dropped when full"""
+        cache = TokenCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Test entries older than the timeout are not returned"""
+        cache = TokenCache(timeout=0)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_disabled(self):
+        """Test a cache of size 0 keeps nothing"""
+        cache = TokenCache(max_size=0)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_eviction_reaches_other_processes(self):
+        """Test a key evicted by one process isn't served from the local
+        tier of another sharing the cache"""
+        api_worker = TokenCache(cache_alias='default')
+        admin_worker = TokenCache(cache_alias='default')
+        api_worker.set('a', 1)
+        self.assertEqual(api_worker.get('a'), 1)
+
+        admin_worker.delete('a')
+
+        self.assertIsNone(api_worker.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication backend"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'token@gmail.com',
+            'test123',
+            name='Token'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_cached_token_skips_database(self):
+        """Test a known token authenticates without any query"""
+        backend = CachedTokenAuthentication()
+        with self.assertNumQueries(1):
+            backend.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = backend.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_cached_user_not_shared(self):
+        """Test every request gets its own copy of the cached user"""
+        backend = CachedTokenAuthentication()
+        first, _ = backend.authenticate_credentials(self.token.key)
+        first.name = 'changed'
+        second, _ = backend.authenticate_credentials(self.token.key)
+        second.name = 'changed again'
+        third, _ = backend.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(second, third)
+        self.assertEqual(third.name, 'Token')
+
+    def test_deleted_token_rejected(self):
+        """Test deleting the token invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating the user invalidates the cached entry"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_refreshes_user(self):
+        """Test changing the password through the API reloads the user"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'new name', 'password': 'newpass'})
+
+        self.assertIsNone(token_cache.get(self.token.key))
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.data['name'], 'new name')